@@ -61,8 +61,8 @@ def importModules():
                     "fix", "modifier", "animation", "load_morph", "morphing", "panel",
                     "material", "cycles", "cgroup", "pbr", "render", "camera", "light",
                     "guess", "convert", "files", "main", "finger",
-                    "matedit", "tables", "proxy", "rigify", "merge", "hide",
-                    "mhx", "layers", "hair", "transfer", "dforce",
+                    "matedit", "topology", "tables", "proxy", "rigify", "merge", "hide",
+                    "mhx", "layers", "hairstrands", "hair", "transfer", "dforce",
                     "hdmorphs", "facecap", "api",
                     "runtime.morph_armature"]
         if bpy.app.version >= (2,82,0):
@@ -101,6 +101,7 @@ def register():
     matedit.register()
     cgroup.register()
     hair.register()
+    topology.register()
     mhx.register()
     objfile.register()
     proxy.register()
@@ -136,6 +137,7 @@ def unregister():
     matedit.unregister()
     cgroup.unregister()
     hair.unregister()
+    topology.unregister()
     mhx.unregister()
     objfile.unregister()
     proxy.unregister()
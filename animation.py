@@ -33,7 +33,7 @@ from collections import OrderedDict
 from mathutils import *
 from .error import *
 from .utils import *
-from .transform import Transform
+from .transform import Transform, KeyframeBuffer
 from .fileutils import MultiFile, SingleFile, JsonFile, JsonExportFile, DufFile
 
 #-------------------------------------------------------------
@@ -50,22 +50,144 @@ def getAlias(prop, rig):
 #   Convert between frames and vectors
 #-------------------------------------------------------------
 
-def framesToVectors(frames):
-    vectors = {}
-    for idx in frames.keys():
-        for t,y in frames[idx]:
-            if t not in vectors.keys():
-                vectors[t] = Vector((0,0,0))
-            vectors[t][idx] = y
-    return vectors
-
-
 def vectorsToFrames(vectors):
     frames = {}
     for idx in range(3):
         frames[idx] = [[t,vectors[t][idx]] for t in vectors.keys()]
     return frames
 
+#-------------------------------------------------------------
+#   Batched rotation matrices
+#-------------------------------------------------------------
+
+def eulerToMatrices(angles, order):
+    import numpy as np
+    angles = np.asarray(angles, dtype=float)
+    mats = np.tile(np.identity(3), (len(angles),1,1))
+    for char in order:
+        idx = ord(char) - ord('X')
+        i,j = [(1,2), (2,0), (0,1)][idx]
+        c = np.cos(angles[:,idx])
+        s = np.sin(angles[:,idx])
+        rmat = np.tile(np.identity(3), (len(angles),1,1))
+        rmat[:,i,i] = c
+        rmat[:,i,j] = -s
+        rmat[:,j,i] = s
+        rmat[:,j,j] = c
+        mats = rmat @ mats
+    return mats
+
+
+EulerOrders = {
+    'XYZ' : (0, 1, 2, False),
+    'XZY' : (0, 2, 1, True),
+    'YXZ' : (1, 0, 2, True),
+    'YZX' : (1, 2, 0, False),
+    'ZXY' : (2, 0, 1, False),
+    'ZYX' : (2, 1, 0, True),
+}
+
+def getEulerPairs(mats, order):
+    import numpy as np
+    mats = np.asarray(mats, dtype=float)[:,:3,:3]
+    mats = mats / np.linalg.norm(mats, axis=1)[:,np.newaxis,:]
+    # Index as mat[col][row], like mat3_normalized_to_eulO in Blender
+    m = mats.transpose((0,2,1))
+    i,j,k,parity = EulerOrders[order]
+    cy = np.hypot(m[:,i,i], m[:,i,j])
+    eul1 = np.empty((len(m),3))
+    eul2 = np.empty((len(m),3))
+    eul1[:,i] = np.arctan2(m[:,j,k], m[:,k,k])
+    eul1[:,j] = np.arctan2(-m[:,i,k], cy)
+    eul1[:,k] = np.arctan2(m[:,i,j], m[:,i,i])
+    eul2[:,i] = np.arctan2(-m[:,j,k], -m[:,k,k])
+    eul2[:,j] = np.arctan2(-m[:,i,k], -cy)
+    eul2[:,k] = np.arctan2(-m[:,i,j], -m[:,i,i])
+    gimbal = (cy <= 16*np.finfo(np.float32).eps)
+    if gimbal.any():
+        eul1[gimbal,i] = np.arctan2(-m[gimbal,k,j], m[gimbal,j,j])
+        eul1[gimbal,k] = 0
+        eul2[gimbal] = eul1[gimbal]
+    if parity:
+        eul1 = -eul1
+        eul2 = -eul2
+    return eul1, eul2
+
+
+def matricesToEulers(mats, order):
+    import numpy as np
+    eul1,eul2 = getEulerPairs(mats, order)
+    use2 = (np.abs(eul1).sum(axis=1) > np.abs(eul2).sum(axis=1))
+    eul1[use2] = eul2[use2]
+    return eul1
+
+
+def matricesToCompatibleEulers(mats, order):
+    # Like to_euler(order, previous): pick the solution closest to the previous frame
+    import numpy as np
+    eul1,eul2 = getEulerPairs(mats, order)
+    use2 = (np.abs(eul1).sum(axis=1) > np.abs(eul2).sum(axis=1))
+    eulers = np.where(use2[:,np.newaxis], eul2, eul1)
+    if len(eulers) < 2:
+        return eulers
+    twopi = 2*math.pi
+    eul1 = eul1.tolist()
+    eul2 = eul2.tolist()
+    prev = eulers[0].tolist()
+    result = [prev]
+    for e1,e2 in zip(eul1[1:], eul2[1:]):
+        best = None
+        for eul in (e1, e2):
+            eul = [x + twopi*round((p-x)/twopi) for x,p in zip(eul, prev)]
+            diff = sum([abs(x-p) for x,p in zip(eul, prev)])
+            if best is None or diff < best[0]:
+                best = (diff, eul)
+        prev = best[1]
+        result.append(prev)
+    return np.array(result)
+
+
+def matricesToQuats(mats):
+    import numpy as np
+    mats = np.asarray(mats, dtype=float)[:,:3,:3]
+    mats = mats / np.linalg.norm(mats, axis=1)[:,np.newaxis,:]
+    m = mats.transpose((0,2,1))
+    quats = np.empty((len(m),4))
+    tr = 0.25*(1 + m[:,0,0] + m[:,1,1] + m[:,2,2])
+    case0 = (tr > 1e-4)
+    case1 = ~case0 & (m[:,0,0] > m[:,1,1]) & (m[:,0,0] > m[:,2,2])
+    case2 = ~case0 & ~case1 & (m[:,1,1] > m[:,2,2])
+    case3 = ~case0 & ~case1 & ~case2
+    c = m[case0]
+    s = np.sqrt(tr[case0])
+    quats[case0] = np.stack((s, (c[:,1,2]-c[:,2,1])/(4*s), (c[:,2,0]-c[:,0,2])/(4*s), (c[:,0,1]-c[:,1,0])/(4*s)), axis=1)
+    c = m[case1]
+    s = 2*np.sqrt(1 + c[:,0,0] - c[:,1,1] - c[:,2,2])
+    quats[case1] = np.stack(((c[:,1,2]-c[:,2,1])/s, 0.25*s, (c[:,1,0]+c[:,0,1])/s, (c[:,2,0]+c[:,0,2])/s), axis=1)
+    c = m[case2]
+    s = 2*np.sqrt(1 + c[:,1,1] - c[:,0,0] - c[:,2,2])
+    quats[case2] = np.stack(((c[:,2,0]-c[:,0,2])/s, (c[:,1,0]+c[:,0,1])/s, 0.25*s, (c[:,2,1]+c[:,1,2])/s), axis=1)
+    c = m[case3]
+    s = 2*np.sqrt(1 + c[:,2,2] - c[:,0,0] - c[:,1,1])
+    quats[case3] = np.stack(((c[:,0,1]-c[:,1,0])/s, (c[:,2,0]+c[:,0,2])/s, (c[:,2,1]+c[:,1,2])/s, 0.25*s), axis=1)
+    return quats / np.linalg.norm(quats, axis=1)[:,np.newaxis]
+
+
+def quatToMatrices(quats):
+    import numpy as np
+    w,x,y,z = np.asarray(quats, dtype=float).T
+    mats = np.empty((len(w),3,3))
+    mats[:,0,0] = 1 - 2*(y*y + z*z)
+    mats[:,0,1] = 2*(x*y - w*z)
+    mats[:,0,2] = 2*(x*z + w*y)
+    mats[:,1,0] = 2*(x*y + w*z)
+    mats[:,1,1] = 1 - 2*(x*x + z*z)
+    mats[:,1,2] = 2*(y*z - w*x)
+    mats[:,2,0] = 2*(x*z - w*y)
+    mats[:,2,1] = 2*(y*z + w*x)
+    mats[:,2,2] = 1 - 2*(x*x + y*y)
+    return mats
+
 #-------------------------------------------------------------
 #   Combine bend and twist. Unused
 #-------------------------------------------------------------
@@ -152,7 +274,49 @@ def getChannel(url):
 #   Frame converter class
 #-------------------------------------------------------------
 
+class ConversionContext:
+    def __init__(self, rig):
+        self.rig = rig
+        self.converters = {}
+        self.matrices = {}
+        self.characters = {}
+        self.locks = {}
+        self.reader = None
+        self.texts = {}
+
+
+    def startReading(self, filepaths):
+        from concurrent.futures import ThreadPoolExecutor
+        from .load_json import readJsonText
+        self.reader = ThreadPoolExecutor(max_workers=min(8, len(filepaths)))
+        for filepath in filepaths:
+            self.texts[filepath] = self.reader.submit(readJsonText, filepath)
+
+
+    def getText(self, filepath):
+        if filepath not in self.texts.keys():
+            return None
+        future = self.texts.pop(filepath)
+        try:
+            return future.result()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+
+    def close(self):
+        if self.reader:
+            for future in self.texts.values():
+                future.cancel()
+            self.reader.shutdown(wait=True)
+            self.reader = None
+        self.texts = {}
+        for pb,lock in self.locks.values():
+            pb.lock_location = lock
+        self.locks = {}
+
+
 class FrameConverter:
+    rigContext = None
 
     def getConv(self, bones, rig):
         from .figure import getRigType
@@ -167,11 +331,16 @@ class FrameConverter:
             stype = "genesis8"
         else:
             stype = getRigType(bones, False)
-        if stype:
+        ctx = self.rigContext
+        if stype and ctx and stype in ctx.converters.keys():
+            conv,twists = ctx.converters[stype]
+        elif stype:
             print("Auto-detected %s character in duf/dsf file" % stype)
             conv,twists = getConverter(stype, rig)
             if not conv:
                 conv = {}
+            if ctx:
+                ctx.converters[stype] = (conv, twists)
         else:
             print("Could not auto-detect character in duf/dsf file")
         bonemap = OrderedDict()
@@ -179,13 +348,21 @@ class FrameConverter:
 
 
     def getRigifyLocks(self, rig, conv):
+        # With a conversion context, locks are restored when the context is closed
+        ctx = self.rigContext
         locks = []
         if rig.DazRig[0:6] == "rigify":
             for bname in conv.values():
                 if (bname in rig.pose.bones.keys() and
                     bname not in ["torso"]):
+                    if ctx and bname in ctx.locks.keys():
+                        continue
                     pb = rig.pose.bones[bname]
-                    locks.append((pb, tuple(pb.lock_location)))
+                    lock = (pb, tuple(pb.lock_location))
+                    if ctx:
+                        ctx.locks[bname] = lock
+                    else:
+                        locks.append(lock)
                     pb.lock_location = (True, True, True)
         return locks
 
@@ -223,7 +400,13 @@ class FrameConverter:
     def convertAllFrames(self, anims, rig, bonemap):
         from .convert import getCharacter, getParent
 
-        trgCharacter = getCharacter(rig)
+        ctx = self.rigContext
+        if ctx and rig.name in ctx.characters.keys():
+            trgCharacter = ctx.characters[rig.name]
+        else:
+            trgCharacter = getCharacter(rig)
+            if ctx:
+                ctx.characters[rig.name] = trgCharacter
         if trgCharacter is None:
             return anims
 
@@ -261,31 +444,50 @@ class FrameConverter:
 
 
     def getMatrices(self, bname, rig, char, parname, restmats, transmats, xyzs):
-        from .convert import getOrientation
-
-        orient,xyzs[bname] = getOrientation(char, bname, rig)
-        if orient is None:
+        ctx = self.rigContext
+        key = (bname, (rig is not None), char, parname)
+        if ctx and key in ctx.matrices.keys():
+            restmat,transmat,xyz = ctx.matrices[key]
+        else:
+            restmat,transmat,xyz = self.computeMatrices(bname, rig, char, parname)
+            if ctx:
+                ctx.matrices[key] = (restmat, transmat, xyz)
+        xyzs[bname] = xyz
+        if restmat is None:
             return
-        restmats[bname] = Euler(Vector(orient)*D, 'XYZ').to_matrix()
+        restmats[bname] = restmat
+        transmats[bname] = transmat
 
-        orient = None
+
+    def computeMatrices(self, bname, rig, char, parname):
+        from .convert import getRestMatrix
+
+        restmat,xyz = getRestMatrix(char, bname, rig)
+        if restmat is None:
+            return None, None, xyz
+        parmat = None
         if parname:
-            orient,xyz = getOrientation(char, parname, rig)
-            if orient:
-                parmat = Euler(Vector(orient)*D, 'XYZ').to_matrix()
-                transmats[bname] = restmats[bname] @ parmat.inverted()
-        if orient is None:
-            transmats[bname] = Matrix().to_3x3()
+            parmat,parxyz = getRestMatrix(char, parname, rig)
+        if parmat is None:
+            transmat = Matrix().to_3x3()
+        else:
+            transmat = restmat @ parmat.inverted()
+        return restmat, transmat, xyz
 
 
     def convertFrames(self, amat, bmat, xyz, nxyz, frames):
-        vecs = framesToVectors(frames)
-        nvecs = {}
-        for t,vec in vecs.items():
-            mat = Euler(vec*D, xyz).to_matrix()
-            nmat = amat @ mat @ bmat
-            nvecs[t] = Vector(nmat.to_euler(nxyz))/D
-        return vectorsToFrames(nvecs)
+        import numpy as np
+        times = list(dict.fromkeys([t for idx in frames.keys() for t,y in frames[idx]]))
+        if not times:
+            return vectorsToFrames({})
+        rows = dict([(t,n) for n,t in enumerate(times)])
+        angles = np.zeros((len(times),3))
+        for idx in frames.keys():
+            for t,y in frames[idx]:
+                angles[rows[t],idx] = y
+        mats = np.array(amat) @ eulerToMatrices(angles*D, xyz) @ np.array(bmat)
+        nangles = matricesToCompatibleEulers(mats, nxyz)/D
+        return dict([(idx, [[t,y] for t,y in zip(times, nangles[:,idx].tolist())]) for idx in range(3)])
 
 #-------------------------------------------------------------
 #   HideOperator class
@@ -461,6 +663,47 @@ class ActionOptions:
                 act.name = self.actionName
 
 
+class ReduceOptions:
+    useReduceKeys : BoolProperty(
+        name = "Reduce Keys",
+        description = "Remove keyframes that can be interpolated from their neighbours",
+        default = False)
+
+    rotationTolerance : FloatProperty(
+        name = "Rotation Tolerance",
+        description = "Max rotation error (degrees) when reducing keys",
+        min = 0.0,
+        default = 0.1)
+
+    locationTolerance : FloatProperty(
+        name = "Location Tolerance",
+        description = "Max location error (cm) when reducing keys",
+        min = 0.0,
+        default = 0.01)
+
+    valueTolerance : FloatProperty(
+        name = "Value Tolerance",
+        description = "Max error for scale and morph values when reducing keys",
+        min = 0.0,
+        default = 0.001)
+
+    def draw(self, context):
+        self.layout.prop(self, "useReduceKeys")
+        if self.useReduceKeys:
+            box = self.layout.box()
+            box.prop(self, "rotationTolerance")
+            box.prop(self, "locationTolerance")
+            box.prop(self, "valueTolerance")
+
+    def reduceKeys(self, ob):
+        if not (ob.animation_data and ob.animation_data.action):
+            return 0,0
+        act = ob.animation_data.action
+        nold,nnew = reduceAction(act, ob.DazScale, self.rotationTolerance, self.locationTolerance, self.valueTolerance)
+        print("Action %s: %d keys reduced to %d" % (act.name, nold, nnew))
+        return nold,nnew
+
+
 class PoseLibOptions:
     makeNewPoseLib : BoolProperty(
         name = "New Pose Library",
@@ -486,6 +729,12 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
     filename_ext = ".duf"
     filter_glob : StringProperty(default = G.theDazDefaults + G.theImagedDefaults, options={'HIDDEN'})
     lockMeshes = False
+    useJsonStream = True
+
+    useParallelRead : BoolProperty(
+        name = "Parallel File Reading",
+        description = "Read and decompress the selected files in background threads.\nUses more memory",
+        default = False)
 
     def __init__(self):
         pass
@@ -506,6 +755,7 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
         layout.prop(self, "convertPoses")
         if self.convertPoses:
             layout.prop(self, "srcCharacter")
+        layout.prop(self, "useParallelRead")
 
 
     def getSingleAnimation(self, filepath, context, offset):
@@ -513,13 +763,22 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
         if filepath is None:
             return offset,None
         ext = os.path.splitext(filepath)[1]
-        if ext in [".duf", ".dsf"]:
-            struct = loadJson(filepath, False)
-        else:
+        if ext not in [".duf", ".dsf"]:
             raise DazError("Wrong type of file: %s" % filepath)
-        if "scene" not in struct.keys():
-            return offset,None
-        animations = self.parseScene(struct["scene"])
+        if self.useJsonStream:
+            from .load_json import AnimationStream
+            text = None
+            if self.rigContext:
+                text = self.rigContext.getText(filepath)
+            stream = AnimationStream(filepath, text)
+            animations = self.parseStream(stream)
+            if not stream.hasScene:
+                return offset,None
+        else:
+            struct = loadJson(filepath, False)
+            if "scene" not in struct.keys():
+                return offset,None
+            animations = self.parseScene(struct["scene"])
         rig = context.object
         if rig.type == 'ARMATURE':
             setMode('POSE')
@@ -560,55 +819,68 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
         return animations
 
 
+    def parseStream(self, stream):
+        animations = []
+        bones = {}
+        values = {}
+        animations.append((bones, values))
+        for url,keys in stream:
+            self.addAnimation(url, keys, bones, values)
+        if not stream.hasAnimations:
+            self.checkExtra(stream.extra)
+        self.completeAnimations(bones)
+        return animations
+
+
     def parseAnimations(self, struct, bones, values):
         if "animations" in struct.keys():
             for anim in struct["animations"]:
                 if "url" in anim.keys():
-                    key,channel,comp = getChannel(anim["url"])
-                    if channel is None:
-                        continue
-                    elif channel == "value":
-                        if self.affectMorphs:
-                            values[key] = getAnimKeys(anim)
-                    elif channel in ["translation", "rotation", "scale"]:
-                        if key not in bones.keys():
-                            bone = bones[key] = {
-                                "translation" : {},
-                                "rotation" : {},
-                                "scale" : {},
-                                "general_scale" : {},
-                                }
-                        idx = getIndex(comp)
-                        if idx >= 0:
-                            bones[key][channel][idx] = getAnimKeys(anim)
-                        else:
-                            bones[key]["general_scale"][0] = getAnimKeys(anim)
-                    else:
-                        print("Unknown channel:", channel)
+                    self.addAnimation(anim["url"], getAnimKeys(anim), bones, values)
         elif "extra" in struct.keys():
-            for extra in struct["extra"]:
-                if extra["type"] == "studio/scene_data/aniMate":
-                    msg = ("Animation with aniblocks.\n" +
-                           "In aniMate Lite tab, right-click         \n" +
-                           "and Bake To Studio Keyframes.")
-                    print(msg)
-                    raise DazError(msg)
+            self.checkExtra(struct["extra"])
         elif self.verbose:
             print("No animations in this file")
 
 
-    def completeAnimations(self, bones):
-        def addMissing(t, y, y0, miss, anim):
-            if miss:
-                if y0 is None:
-                    for t1 in miss:
-                        anim.append((t1,y))
-                else:
-                    k = (y-y0)/(t-t0)
-                    for t1 in miss:
-                        y1 = y0 + k*(t1-t0)
-                        anim.append((t1,y1))
+    def addAnimation(self, url, keys, bones, values):
+        key,channel,comp = getChannel(url)
+        if channel is None:
+            return
+        elif channel == "value":
+            if self.affectMorphs:
+                values[key] = keys
+        elif channel in ["translation", "rotation", "scale"]:
+            if key not in bones.keys():
+                bone = bones[key] = {
+                    "translation" : {},
+                    "rotation" : {},
+                    "scale" : {},
+                    "general_scale" : {},
+                    }
+            idx = getIndex(comp)
+            if idx >= 0:
+                bones[key][channel][idx] = keys
+            else:
+                bones[key]["general_scale"][0] = keys
+        else:
+            print("Unknown channel:", channel)
+
+
+    def checkExtra(self, extras):
+        for extra in extras:
+            if extra["type"] == "studio/scene_data/aniMate":
+                msg = ("Animation with aniblocks.\n" +
+                       "In aniMate Lite tab, right-click         \n" +
+                       "and Bake To Studio Keyframes.")
+                print(msg)
+                raise DazError(msg)
+        if self.verbose:
+            print("No animations in this file")
 
+
+    def completeAnimations(self, bones):
+        import numpy as np
         frames = {}
         for bname in bones.keys():
             for channel in bones[bname].keys():
@@ -619,31 +891,18 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
             return
         frames = list(frames)
         frames.sort()
+        times = np.array(frames, dtype=float)
         for bname in bones.keys():
             for channel in bones[bname].keys():
                 for idx,anim in bones[bname][channel].items():
                     if len(anim) == len(frames):
                         continue
-                    kpts = dict(anim)
-                    anim = []
-                    miss = []
-                    t0 = 0.0
-                    y0 = None
-                    for t in frames:
-                        if t in kpts.keys():
-                            y = kpts[t]
-                            addMissing(t, y, y0, miss, anim)
-                            anim.append((t,y))
-                            miss = []
-                            t0 = t
-                            y0 = y
-                        else:
-                            miss.append(t)
-                    if miss:
-                        y = anim[-1][1]
-                        for t1 in miss:
-                            anim.append((t1,y))
-                    bones[bname][channel][idx] = anim
+                    kpts = sorted(dict(anim).items())
+                    ts = np.array([t for t,y in kpts], dtype=float)
+                    ys = np.array([y for t,y in kpts], dtype=float)
+                    # Linear between keys, hold first and last value outside
+                    values = np.interp(times, ts, ys)
+                    bones[bname][channel][idx] = list(zip(frames, values.tolist()))
 
 
     def isAvailable(self, pb, rig):
@@ -714,6 +973,10 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
     def animateBones(self, context, animations, offset, prop, filepath):
         rig = context.object
         errors = {}
+        if self.useInsertKeys:
+            self.keys = KeyframeBuffer(rig)
+        else:
+            self.keys = None
         for banim,vanim in animations:
             frames = {}
             n = -1
@@ -761,7 +1024,7 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
                         if self.affectObject != 'NONE':
                             tfm.setRna(rig)
                             if self.useInsertKeys:
-                                tfm.insertKeys(rig, None, n+offset, rig.name, self.driven)
+                                tfm.insertKeys(rig, None, n+offset, rig.name, self.driven, self.keys)
                     elif rig.type != 'ARMATURE':
                         continue
                     elif bname in rig.data.bones.keys():
@@ -779,7 +1042,7 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
                                     value = float(value)
                                 rig[key] = value
                                 if self.useInsertKeys:
-                                    rig.keyframe_insert(propRef(key), frame=n+offset, group="Morphs")
+                                    self.keys.insert(rig, propRef(key), n+offset, "Morphs")
 
                 for (bname, tfm, value) in twists:
                     self.transformBone(rig, bname, tfm, value, n, offset, True)
@@ -792,13 +1055,15 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
                         hand.location = foot.location = Zero
                         self.fixForearmFollow("MhaForearmFollow_" + suffix, rig, hand, forearm)
                         if self.useInsertKeys:
-                            tfm.insertKeys(rig, forearm, n+offset, forearm.name, self.driven)
-                            tfm.insertKeys(rig, hand, n+offset, hand.name, self.driven)
-                            tfm.insertKeys(rig, foot, n+offset, foot.name, self.driven)
+                            tfm.insertKeys(rig, forearm, n+offset, forearm.name, self.driven, self.keys)
+                            tfm.insertKeys(rig, hand, n+offset, hand.name, self.driven, self.keys)
+                            tfm.insertKeys(rig, foot, n+offset, foot.name, self.driven, self.keys)
 
                 self.saveScales(rig, n+offset)
 
             self.fixScales(rig)
+            if self.keys:
+                self.keys.write()
             if self.usePoseLib:
                 name = os.path.splitext(os.path.basename(filepath))[0]
                 self.addToPoseLib(rig, name)
@@ -856,7 +1121,7 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
             if self.isAvailable(pb, rig):
                 pb.scale = One
                 if self.useInsertKeys:
-                    pb.keyframe_insert("scale", frame=frame, group=pb.name)
+                    self.keys.insert(pb, "scale", frame, pb.name)
 
 
     def saveScales(self, rig, frame):
@@ -874,7 +1139,7 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
                     smat = smats[pb.name] @ smats[pb.parent.name].inverted()
                     pb.scale = smat.to_scale()
                     if self.useInsertKeys:
-                        pb.keyframe_insert("scale", frame=frame, group=pb.name)
+                        self.keys.insert(pb, "scale", frame, pb.name)
 
 
     def getRigKey(self, key, rig, value):
@@ -907,7 +1172,7 @@ class AnimatorBase(MultiFile, FrameConverter, ConvertOptions, AffectOptions, IsM
                 setBoneTransform(tfm, pb)
                 self.imposeLocks(pb)
             if self.useInsertKeys:
-                tfm.insertKeys(rig, pb, n+offset, bname, self.driven)
+                tfm.insertKeys(rig, pb, n+offset, bname, self.driven, self.keys)
         else:
             pass
 
@@ -1002,14 +1267,23 @@ class StandardAnimation:
             raise DazError("No corresponding DAZ file selected")
         self.verbose = (nfiles == 1)
 
-        for filepath in dazfiles:
-            if self.atFrameOne and len(dazfiles) == 1:
-                offset = 1
-            print("*", os.path.basename(filepath), offset)
-            offset,prop = self.getSingleAnimation(filepath, context, offset)
-            if prop:
-                props.append(prop)
-
+        self.rigContext = ConversionContext(rig)
+        if self.useParallelRead and self.useJsonStream and nfiles > 1:
+            self.rigContext.startReading(dazfiles)
+        try:
+            for filepath in dazfiles:
+                if self.atFrameOne and len(dazfiles) == 1:
+                    offset = 1
+                print("*", os.path.basename(filepath), offset)
+                offset,prop = self.getSingleAnimation(filepath, context, offset)
+                if prop:
+                    props.append(prop)
+        finally:
+            self.rigContext.close()
+            self.rigContext = None
+
+        if self.useAction and self.useReduceKeys:
+            self.reduceKeys(rig)
         t2 = perf_counter()
         print("File %s imported in %.3f seconds" % (self.filepath, t2-t1))
         scn.frame_current = startframe
@@ -1141,6 +1415,8 @@ theMorphTables = {}
 #-------------------------------------------------------------
 
 class NodePose:
+    useJsonStream = False
+
     def parseAnimations(self, struct, bones, values):
         if "nodes" in struct.keys():
             for node in struct["nodes"]:
@@ -1170,7 +1446,7 @@ class NodePose:
 #   Import Action
 #-------------------------------------------------------------
 
-class ActionBase(ActionOptions, AnimatorBase):
+class ActionBase(ActionOptions, ReduceOptions, AnimatorBase):
     verbose = False
     useAction = True
     usePoseLib = False
@@ -1178,6 +1454,7 @@ class ActionBase(ActionOptions, AnimatorBase):
     def draw(self, context):
         AnimatorBase.draw(self, context)
         ActionOptions.draw(self, context)
+        ReduceOptions.draw(self, context)
 
 
 class DAZ_OT_ImportAction(HideOperator, ActionBase, StandardAnimation):
@@ -1326,56 +1603,257 @@ class DAZ_OT_ClearPose(DazOperator, IsMeshArmature):
 #   Prune action
 #----------------------------------------------------------
 
-def pruneAction(act, cm):
-    def matchAll(kpts, default, eps):
-        for kp in kpts:
-            if abs(kp.co[1] - default) > eps:
-                return False
-        return True
+KeyAttributes = [
+    ("co", 2, "float32"),
+    ("handle_left", 2, "float32"),
+    ("handle_right", 2, "float32"),
+    ("interpolation", 1, "int32"),
+    ("easing", 1, "int32"),
+    ("handle_left_type", 1, "int32"),
+    ("handle_right_type", 1, "int32"),
+    ("type", 1, "int32"),
+    ("back", 1, "float32"),
+    ("amplitude", 1, "float32"),
+    ("period", 1, "float32"),
+]
 
+def getKeyData(fcu):
+    import numpy as np
+    kpts = fcu.keyframe_points
+    npoints = len(kpts)
+    data = {}
+    for attr,size,dtype in KeyAttributes:
+        values = np.empty(size*npoints, dtype=dtype)
+        kpts.foreach_get(attr, values)
+        data[attr] = values.reshape((npoints,size))
+    return data
+
+
+def clearKeyPoints(kpts):
+    if hasattr(kpts, "clear"):
+        kpts.clear()
+    else:
+        for n in range(len(kpts)-1, -1, -1):
+            kpts.remove(kpts[n], fast=True)
+
+
+def keepKeyPoints(fcu, data, keep):
+    # Rebuild the curve from the kept keys, so that each key keeps its own
+    # interpolation and handles and no keys are removed one by one.
+    import numpy as np
+    kpts = fcu.keyframe_points
+    npoints = len(kpts)
+    nkeep = np.count_nonzero(keep)
+    if nkeep == npoints:
+        return npoints
+    clearKeyPoints(kpts)
+    kpts.add(nkeep)
+    for attr,size,dtype in KeyAttributes:
+        kpts.foreach_set(attr, data[attr][keep].ravel())
+    fcu.update()
+    return nkeep
+
+
+def getPruneLimits(fcu, cm):
+    channel = fcu.data_path.rsplit(".", 1)[-1]
+    if channel == "scale":
+        return 1, 0.001
+    elif channel == "rotation_quaternion":
+        if fcu.array_index == 0:
+            return 1, 1e-4
+        return 0, 1e-4
+    elif channel == "rotation_euler":
+        return 0, 1e-4
+    elif channel == "location":
+        return 0, 0.001*cm
+    else:
+        return 0, 1e-6
+
+
+def getPrunedKeys(ys, eps):
+    import numpy as np
+    keep = np.ones(len(ys), dtype=bool)
+    if len(ys) < 3:
+        return keep
+    # Keys in the same eps-bucket form a run; only the ends of a run are needed
+    buckets = np.round(ys/eps)
+    same = (buckets[1:] == buckets[:-1])
+    keep[1:-1] = ~(same[:-1] & same[1:])
+    return keep
+
+
+def pruneAction(act, cm):
+    import numpy as np
     deletes = []
+    nkeys = nremoved = 0
     for fcu in act.fcurves:
-        kpts = fcu.keyframe_points
-        channel = fcu.data_path.rsplit(".", 1)[-1]
-        if len(kpts) == 0:
+        npoints = len(fcu.keyframe_points)
+        nkeys += npoints
+        if npoints == 0:
+            deletes.append(fcu)
+            continue
+        data = getKeyData(fcu)
+        ys = data["co"][:,1].astype(float)
+        default,eps = getPruneLimits(fcu, cm)
+        if np.all(np.abs(ys - default) <= eps):
             deletes.append(fcu)
+            nremoved += npoints
+        elif np.all(np.abs(ys - ys[0]) <= eps):
+            keep = np.zeros(npoints, dtype=bool)
+            keep[0] = True
+            nremoved += npoints - keepKeyPoints(fcu, data, keep)
         else:
-            default = 0
-            eps = 0
-            if channel == "scale":
-                default = 1
-                eps = 0.001
-            elif (channel == "rotation_quaternion" and
-                fcu.array_index == 0):
-                default = 1
-                eps = 1e-4
-            elif channel == "rotation_quaternion":
-                eps = 1e-4
-            elif channel == "rotation_euler":
-                eps = 1e-4
-            elif channel == "location":
-                eps = 0.001*cm
-            if matchAll(kpts, default, eps):
-                deletes.append(fcu)
+            nremoved += npoints - keepKeyPoints(fcu, data, getPrunedKeys(ys, eps))
 
     for fcu in deletes:
         act.fcurves.remove(fcu)
+    return len(deletes), nkeys, nremoved
 
 
-class DAZ_OT_PruneAction(DazOperator):
+class DAZ_OT_PruneAction(DazPropsOperator):
     bl_idname = "daz.prune_action"
     bl_label = "Prune Action"
-    bl_description = "Remove F-curves with zero keys only"
+    bl_description = "Remove F-curves that stay at their default value,\nand redundant keys in constant stretches"
     bl_options = {'UNDO'}
 
+    useAllActions : BoolProperty(
+        name = "All Actions",
+        description = "Prune all actions in the file, not only the active one",
+        default = False)
+
     @classmethod
     def poll(self, context):
         ob = context.object
         return (ob and ob.animation_data and ob.animation_data.action)
 
+    def draw(self, context):
+        self.layout.prop(self, "useAllActions")
+
     def run(self, context):
         ob = context.object
-        pruneAction(ob.animation_data.action, ob.DazScale)
+        if self.useAllActions:
+            acts = list(bpy.data.actions)
+        else:
+            acts = [ob.animation_data.action]
+        scales = self.getActionScales(ob)
+        ncurves = nkeys = nremoved = 0
+        for act in acts:
+            info = pruneAction(act, scales.get(act.name, ob.DazScale))
+            ncurves += info[0]
+            nkeys += info[1]
+            nremoved += info[2]
+        msg = ("Pruned %d actions: removed %d F-curves and %d of %d keys" %
+               (len(acts), ncurves, nremoved, nkeys))
+        print(msg)
+        self.report({'INFO'}, msg)
+
+
+    def getActionScales(self, ob):
+        # Each action is pruned with the scale of the object that uses it,
+        # preferring the active object. Unused actions get its scale.
+        scales = {}
+        for ob1 in [ob] + list(bpy.data.objects):
+            adata = ob1.animation_data
+            if adata is None:
+                continue
+            acts = [adata.action]
+            for track in adata.nla_tracks:
+                acts += [strip.action for strip in track.strips]
+            for act in acts:
+                if act and act.name not in scales:
+                    scales[act.name] = ob1.DazScale
+        return scales
+
+#----------------------------------------------------------
+#   Reduce keys
+#----------------------------------------------------------
+
+def getReducedKeys(co, eps):
+    import numpy as np
+    npoints = len(co)
+    keep = np.zeros(npoints, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, npoints-1)]
+    while stack:
+        first,last = stack.pop()
+        if last <= first+1:
+            continue
+        x0,y0 = co[first]
+        x1,y1 = co[last]
+        x = co[first+1:last,0]
+        y = co[first+1:last,1]
+        err = np.abs(y - (y0 + (y1-y0)*(x-x0)/(x1-x0)))
+        n = np.argmax(err)
+        if err[n] > eps:
+            n += first+1
+            keep[n] = True
+            stack.append((first, n))
+            stack.append((n, last))
+    return keep
+
+
+def reduceFCurve(fcu, eps):
+    npoints = len(fcu.keyframe_points)
+    if npoints < 3:
+        return npoints
+    # The error is measured against straight lines, so the kept keys are made
+    # linear. The resulting curve is then evaluated at the removed keys, and
+    # keys where it still deviates more than eps are kept as well.
+    import numpy as np
+    data = getKeyData(fcu)
+    co = data["co"].astype(float)
+    keep = getReducedKeys(co, eps)
+    while True:
+        nkeep = keepKeyPoints(fcu, data, keep)
+        if nkeep == npoints:
+            return nkeep
+        for kp in fcu.keyframe_points:
+            kp.interpolation = 'LINEAR'
+        removed = np.flatnonzero(~keep)
+        errs = np.array([abs(fcu.evaluate(x) - y) for x,y in co[removed]])
+        bad = removed[errs > eps]
+        if len(bad) == 0:
+            return nkeep
+        keep[bad] = True
+
+
+def reduceAction(act, cm, rottol, loctol, valtol):
+    nold = nnew = 0
+    for fcu in act.fcurves:
+        channel = fcu.data_path.rsplit(".", 1)[-1]
+        if channel == "rotation_euler":
+            eps = rottol*D
+        elif channel == "rotation_quaternion":
+            eps = math.sin(0.5*rottol*D)
+        elif channel == "location":
+            eps = loctol*cm
+        else:
+            eps = valtol
+        nold += len(fcu.keyframe_points)
+        nnew += reduceFCurve(fcu, eps)
+    return nold,nnew
+
+
+class DAZ_OT_ReduceKeys(DazPropsOperator, ReduceOptions):
+    bl_idname = "daz.reduce_keys"
+    bl_label = "Reduce Keys"
+    bl_description = "Remove keyframes from the active action that can be interpolated within the tolerances"
+    bl_options = {'UNDO'}
+
+    @classmethod
+    def poll(self, context):
+        ob = context.object
+        return (ob and ob.animation_data and ob.animation_data.action)
+
+    def draw(self, context):
+        self.layout.prop(self, "rotationTolerance")
+        self.layout.prop(self, "locationTolerance")
+        self.layout.prop(self, "valueTolerance")
+
+    def run(self, context):
+        nold,nnew = self.reduceKeys(context.object)
+        if nold:
+            self.report({'INFO'}, "Keys reduced from %d to %d (%.1f%%)" % (nold, nnew, 100.0*nnew/nold))
 
 #-------------------------------------------------------------
 #   Save pose
@@ -1507,6 +1985,53 @@ class FakeCurve:
         return self.value
 
 
+def sampleCurve(fcu, frames):
+    import numpy as np
+    frames = np.asarray(frames, dtype=float)
+    if isinstance(fcu, FakeCurve):
+        return np.full(len(frames), fcu.value, dtype=float)
+    kpts = fcu.keyframe_points
+    npoints = len(kpts)
+    if npoints == 0 or len(fcu.modifiers) > 0:
+        return np.array([fcu.evaluate(frame) for frame in frames], dtype=float)
+    co = np.empty(2*npoints, dtype=np.float32)
+    kpts.foreach_get("co", co)
+    co = co.reshape((npoints,2)).astype(float)
+    times,ys = co[:,0],co[:,1]
+    values = np.empty(len(frames))
+    idxs = np.minimum(np.searchsorted(times, frames), npoints-1)
+    exact = (times[idxs] == frames)
+    values[exact] = ys[idxs[exact]]
+    todo = ~exact
+    if fcu.extrapolation == 'CONSTANT':
+        before = todo & (frames < times[0])
+        after = todo & (frames > times[-1])
+        values[before] = ys[0]
+        values[after] = ys[-1]
+        todo &= ~(before | after)
+    inside = todo & (frames > times[0]) & (frames < times[-1])
+    if inside.any():
+        ipos = set([kp.interpolation for kp in kpts])
+        if ipos == set(['LINEAR']):
+            values[inside] = np.interp(frames[inside], times, ys)
+            todo &= ~inside
+        elif ipos == set(['CONSTANT']):
+            values[inside] = ys[np.searchsorted(times, frames[inside], side="right")-1]
+            todo &= ~inside
+    for n in np.nonzero(todo)[0]:
+        values[n] = fcu.evaluate(frames[n])
+    return values
+
+
+def sampleChannel(fcus, default, frames):
+    import numpy as np
+    values = np.tile(np.array(default, dtype=float), (len(frames),1))
+    for idx,fcu in enumerate(fcus):
+        if fcu:
+            values[:,idx] = sampleCurve(fcu, frames)
+    return values
+
+
 class DAZ_OT_SavePosePreset(HideOperator, SingleFile, DufFile, FrameConverter, IsArmature):
     bl_idname = "daz.save_pose_preset"
     bl_label = "Save Pose Preset"
@@ -1718,70 +2243,48 @@ class DAZ_OT_SavePosePreset(HideOperator, SingleFile, DufFile, FrameConverter, I
 
 
     def setupFrames(self, rig):
+        import numpy as np
+        frames = list(range(self.first, self.last+1))
+        nframes = len(frames)
         self.Ls = {}
-        for frame in range(self.first, self.last+1):
-            L = self.Ls[frame] = {}
-            smats = {}
+        smats = {}
 
-            rot = rig.rotation_euler.copy()
-            for idx,fcu in enumerate(self.rots[""]):
-                if fcu:
-                    rot[idx] = fcu.evaluate(frame)
-            mat = rot.to_matrix().to_4x4()
+        rots = sampleChannel(self.rots[""], rig.rotation_euler, frames)
+        mat = np.tile(np.identity(4), (nframes,1,1))
+        mat[:,:3,:3] = eulerToMatrices(rots, rig.rotation_euler.order)
+        if self.useScale:
+            scales = sampleChannel(self.scales[""], rig.scale, frames)
+            mat[:,:3,:3] *= scales[:,np.newaxis,:]
+        mat[:,:3,3] = sampleChannel(self.locs[""], rig.location, frames)
+        self.Ls[""] = np.array(self.Finv[""]) @ mat @ np.array(self.F[""])
 
-            if self.useScale:
-                scale = rig.scale.copy()
-                for idx,fcu in enumerate(self.scales[""]):
-                    if fcu:
-                        scale[idx] = fcu.evaluate(frame)
-                smat = Matrix.Diagonal(scale)
-                mat = mat @ smat.to_4x4()
-
-            loc = rig.location.copy()
-            for idx,fcu in enumerate(self.locs[""]):
-                if fcu:
-                    loc[idx] = fcu.evaluate(frame)
-            mat.col[3][0:3] = loc
-            L[""] = self.Finv[""] @ mat @ self.F[""]
+        for pb in rig.pose.bones:
+            for bname in self.getBoneNames(pb.name):
+                mat = np.tile(np.identity(4), (nframes,1,1))
+                if bname in self.quats.keys():
+                    quats = sampleChannel(self.quats[bname], pb.rotation_quaternion, frames)
+                    mat[:,:3,:3] = quatToMatrices(quats)
+                elif bname in self.rots.keys():
+                    rots = sampleChannel(self.rots[bname], pb.rotation_euler, frames)
+                    mat[:,:3,:3] = eulerToMatrices(rots, pb.rotation_euler.order)
+                else:
+                    continue
 
-            for pb in rig.pose.bones:
-                for bname in self.getBoneNames(pb.name):
-                    if bname in self.quats.keys():
-                        quat = pb.rotation_quaternion.copy()
-                        for idx,fcu in enumerate(self.quats[bname]):
-                            if fcu:
-                                quat[idx] = fcu.evaluate(frame)
-                        mat = quat.to_matrix().to_4x4()
-                    elif bname in self.rots.keys():
-                        rot = pb.rotation_euler.copy()
-                        for idx,fcu in enumerate(self.rots[bname]):
-                            if fcu:
-                                rot[idx] = fcu.evaluate(frame)
-                        mat = rot.to_matrix().to_4x4()
-                    else:
-                        continue
+                if self.useScale and bname in self.scales.keys():
+                    scales = sampleChannel(self.scales[bname], pb.scale, frames)
+                    smat = np.zeros((nframes,3,3))
+                    for idx in range(3):
+                        smat[:,idx,idx] = scales[:,idx]
+                    if (pb.parent and
+                        pb.parent.name in smats.keys() and
+                        inheritScale(pb)):
+                        smat = smat @ smats[pb.parent.name]
+                    mat[:,:3,:3] = mat[:,:3,:3] @ smat
+                    smats[pb.name] = smat
 
-                    if self.useScale and bname in self.scales.keys():
-                        scale = pb.scale.copy()
-                        for idx,fcu in enumerate(self.scales[bname]):
-                            if fcu:
-                                scale[idx] = fcu.evaluate(frame)
-                        smat = Matrix.Diagonal(scale)
-                        if (pb.parent and
-                            pb.parent.name in smats.keys() and
-                            inheritScale(pb)):
-                            psmat = smats[pb.parent.name]
-                            smat = smat @ psmat
-                        mat = mat @ smat.to_4x4()
-                        smats[pb.name] = smat
-
-                    if bname in self.locs.keys():
-                        loc = pb.location.copy()
-                        for idx,fcu in enumerate(self.locs[bname]):
-                            if fcu:
-                                loc[idx] = fcu.evaluate(frame)
-                        mat.col[3][0:3] = loc
-                    L[bname] = self.Finv[bname] @ mat @ self.F[bname]
+                if bname in self.locs.keys():
+                    mat[:,:3,3] = sampleChannel(self.locs[bname], pb.location, frames)
+                self.Ls[bname] = np.array(self.Finv[bname]) @ mat @ np.array(self.F[bname])
 
 
     def setupConverter(self, rig):
@@ -1889,23 +2392,25 @@ class DAZ_OT_SavePosePreset(HideOperator, SingleFile, DufFile, FrameConverter, I
         if self.useBones:
             for pb in rig.pose.bones:
                 for bname in self.getBoneNames(pb.name):
-                    Ls = [self.Ls[frame][bname] for frame in range(self.first, self.last+1)]
+                    if bname not in self.Ls.keys():
+                        continue
+                    Ls = self.Ls[bname]
                     if self.isLocUnlocked(pb, bname):
-                        locs = [L.to_translation() for L in Ls]
+                        locs = Ls[:,:3,3].tolist()
                         self.getTrans(bname, pb, locs, 1/rig.DazScale, anims)
-                    rots = [L.to_euler(pb.DazRotMode) for L in Ls]
+                    rots = [Matrix(L).to_euler(pb.DazRotMode) for L in Ls[:,:3,:3].tolist()]
                     self.getRot(bname, pb, rots, 1/D, anims)
                     if self.useScale:
-                        scales = [L.to_scale() for L in Ls]
+                        scales = self.getScales(Ls)
                         self.getScale(bname, pb, scales, anims)
 
-            Ls = [self.Ls[frame][""] for frame in range(self.first, self.last+1)]
-            locs = [L.to_translation() for L in Ls]
+            Ls = self.Ls[""]
+            locs = Ls[:,:3,3].tolist()
             self.getTrans("", rig, locs, 1/rig.DazScale, anims)
-            rots = [L.to_euler('XYZ') for L in Ls]
+            rots = [Matrix(L).to_euler('XYZ') for L in Ls[:,:3,:3].tolist()]
             self.getRot("", rig, rots, 1/D, anims)
             if self.useScale:
-                scales = [L.to_scale() for L in Ls]
+                scales = self.getScales(Ls)
                 self.getScale("", rig, scales, anims)
 
         if self.useMorphs:
@@ -1914,13 +2419,18 @@ class DAZ_OT_SavePosePreset(HideOperator, SingleFile, DufFile, FrameConverter, I
         return anims
 
 
+    def getScales(self, Ls):
+        import numpy as np
+        return np.linalg.norm(Ls[:,:3,:3], axis=1).tolist()
+
+
     def getMorph(self, prop, fcu, anims):
         from .asset import normalizeRef
         if prop in self.alias.keys():
             prop = self.alias[prop]
         anim = {}
         anim["url"] = "name://@selection#%s:?value/value" % prop
-        vals = [fcu.evaluate(frame) for frame in range(self.first, self.last+1)]
+        vals = sampleCurve(fcu, range(self.first, self.last+1)).tolist()
         maxval = max(vals)
         minval = min(vals)
         if maxval-minval < 1e-4:
@@ -2296,6 +2806,7 @@ classes = [
     DAZ_OT_ImportNodePose,
     DAZ_OT_ClearPose,
     DAZ_OT_PruneAction,
+    DAZ_OT_ReduceKeys,
     DAZ_OT_SavePoses,
     DAZ_OT_LoadPoses,
     DAZ_OT_BakeToFkRig,
@@ -34,16 +34,70 @@ from .material import WHITE, BLACK
 from .utils import *
 from .error import *
 
+# ---------------------------------------------------------------------
+#   Node group library
+#
+#   Groups are stored by a signature that depends on the group class,
+#   its version and the arguments that change its contents. Groups with
+#   the same signature are built once and shared between materials.
+# ---------------------------------------------------------------------
+
+theNodeGroups = {}
+
+def getLibraryGroup(signature):
+    if signature is None:
+        return None
+    tree = theNodeGroups.get(signature)
+    if tree:
+        try:
+            tree.name
+            return tree
+        except ReferenceError:
+            del theNodeGroups[signature]
+    for tree in bpy.data.node_groups:
+        if tree.get("DazSignature") == signature:
+            theNodeGroups[signature] = tree
+            return tree
+    return None
+
+
+def addLibraryGroup(signature, tree):
+    if signature is not None and tree:
+        tree["DazSignature"] = signature
+        theNodeGroups[signature] = tree
+
+
+def getChannelSignature(mat):
+    import json
+    from hashlib import md5
+    string = json.dumps(mat.channels, sort_keys=True, default=str)
+    return md5(string.encode("utf-8")).hexdigest()
+
 # ---------------------------------------------------------------------
 #   CyclesGroup
 # ---------------------------------------------------------------------
 
 class MaterialGroup:
+    version = 1
+
     def __init__(self):
         self.insockets = []
         self.outsockets = []
 
 
+    def getSignature(self, args, force):
+        if force or args:
+            return None
+        return self.makeSignature()
+
+
+    def makeSignature(self, *data):
+        string = "%s:%d" % (self.__class__.__name__, self.version)
+        if data:
+            string += ":%s" % repr(data)
+        return string
+
+
     def create(self, node, name, parent, ncols):
         self.group = bpy.data.node_groups.new(name, 'ShaderNodeTree')
         node.name = name
@@ -101,6 +155,11 @@ class ShellGroup(MaterialGroup):
         self.group.outputs.new("NodeSocketFloat", "Displacement")
 
 
+    def getSignature(self, args, force):
+        shmat,uvname = args
+        return self.makeSignature(self.push, uvname, getChannelSignature(shmat))
+
+
     def addNodes(self, args):
         shmat,uvname = args
         shmat.rna = self.parent.material.rna
@@ -529,6 +588,11 @@ class RefractionGroup(MixGroup):
 
 class FakeCausticsGroup(MixGroup):
 
+    def getSignature(self, args, force):
+        color = args[0]
+        return self.makeSignature(tuple([round(x, 4) for x in color]))
+
+
     def create(self, node, name, parent):
         MixGroup.create(self, node, name, parent, 6)
 
@@ -865,6 +929,10 @@ class NormalGroup(CyclesGroup):
         self.group.outputs.new("NodeSocketVector", "Normal")
 
 
+    def getSignature(self, args, force):
+        return self.makeSignature(args[0])
+
+
     def addNodes(self, args):
         # Generate TBN from Bump Node
         frame = self.nodes.new("NodeFrame")
@@ -1096,6 +1164,22 @@ class LieGroup(CyclesGroup):
         self.group.outputs.new("NodeSocketColor", "Color")
 
 
+    def getSignature(self, args, force):
+        assets,maps,colorSpace,mat = args
+        data = [colorSpace]
+        for asset,map in zip(assets, maps):
+            data.append((asset.getName(), map.operation, map.transparency,
+                map.invert, map.ismask, map.size, map.rotation,
+                map.xmirror, map.ymirror, map.xscale, map.yscale,
+                map.xoffset, map.yoffset))
+        if [map for map in maps if map.size is not None]:
+            data += [mat.getValue("getChannelHorizontalOffset", 0),
+                     mat.getValue("getChannelVerticalOffset", 0),
+                     mat.getValue("getChannelHorizontalTiles", 1),
+                     mat.getValue("getChannelVerticalTiles", 1)]
+        return self.makeSignature(*data)
+
+
     def addTextureNodes(self, assets, maps, colorSpace):
         texnodes = []
         for idx,asset in enumerate(assets):
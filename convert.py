@@ -28,6 +28,7 @@
 
 import bpy
 import os
+import threading
 from collections import OrderedDict
 from mathutils import *
 from .error import *
@@ -40,6 +41,8 @@ TwistBones = {}
 RestPoses = {}
 Parents = {}
 IkPoses = {}
+RestPoseTables = {}
+theRestPoseLock = threading.RLock()
 
 #-------------------------------------------------------------
 #   Save current pose
@@ -149,13 +152,14 @@ def getCharacter(rig):
         return None
 
 
-def loadRestPoseEntry(character, table, folder):
+def loadRestPoseEntry(character, table, folder, verbose=True):
     import json
     from .fileutils import safeOpen
     if character in table.keys():
         return
     filepath = os.path.join(folder, character +  ".json")
-    print("Load", filepath)
+    if verbose:
+        print("Load", filepath)
     if not os.path.exists(filepath):
         raise DazError("File %s    \n does not exist" % filepath)
     else:
@@ -163,37 +167,89 @@ def loadRestPoseEntry(character, table, folder):
             data = json.load(fp)
     table[character] = data
 
+#-------------------------------------------------------------
+#   Compiled rest pose tables
+#-------------------------------------------------------------
+
+class RestPoseTable:
+    def __init__(self, character):
+        global RestPoses, Parents
+        loadRestPoseEntry(character, RestPoses, G.theRestPoseFolder, False)
+        struct = RestPoses[character]
+        self.character = character
+        if "parent" in struct.keys():
+            self.parentCharacter = struct["parent"].lower().replace(" ", "_")
+        else:
+            self.parentCharacter = character
+        self.orients = {}
+        self.matrices = {}
+        for bname,pose in struct["pose"].items():
+            orient,xyz = pose[-2:]
+            self.orients[bname] = (orient, xyz)
+            self.matrices[bname] = (Euler(Vector(orient)*D, 'XYZ').to_matrix(), xyz)
+        self.parents = None
+
+
+    def getParents(self):
+        global Parents
+        if self.parents is None:
+            parent = self.parentCharacter
+            loadRestPoseEntry(parent, Parents, G.theParentsFolder, False)
+            self.parents = Parents[parent]["parents"]
+        return self.parents
+
+
+def getRestPoseTable(character):
+    with theRestPoseLock:
+        if character not in RestPoseTables.keys():
+            RestPoseTables[character] = RestPoseTable(character)
+        return RestPoseTables[character]
+
+
+def getRestMatrix(character, bname, rig=None):
+    if rig and bname in rig.pose.bones.keys():
+        pb = rig.pose.bones[bname]
+        return Euler(Vector(pb.bone.DazOrient)*D, 'XYZ').to_matrix(), pb.DazRotMode
+    table = getRestPoseTable(character)
+    if bname in table.matrices.keys():
+        mat,xyz = table.matrices[bname]
+        return mat.copy(), xyz
+    else:
+        return None, "XYZ"
+
+
+def preloadRestPoses():
+    # Runs in a background thread, so it must not raise DazError
+    for file in os.listdir(G.theRestPoseFolder):
+        character = os.path.splitext(file)[0]
+        table = getRestPoseTable(character)
+        parent = table.parentCharacter
+        if os.path.exists(os.path.join(G.theParentsFolder, parent + ".json")):
+            table.getParents()
+
+
+def startPreloadingRestPoses():
+    thread = threading.Thread(target=preloadRestPoses, daemon=True)
+    thread.start()
+
 
 def getOrientation(character, bname, rig):
-    global RestPoses
     if rig and bname in rig.pose.bones.keys():
         pb = rig.pose.bones[bname]
         return pb.bone.DazOrient, pb.DazRotMode
-
-    loadRestPoseEntry(character, RestPoses, G.theRestPoseFolder)
-    poses = RestPoses[character]["pose"]
-    if bname in poses.keys():
-        orient, xyz = poses[bname][-2:]
-        return orient, xyz
+    table = getRestPoseTable(character)
+    if bname in table.orients.keys():
+        return table.orients[bname]
     else:
         return None, "XYZ"
 
 
 def getParentCharacter(character):
-    global RestPoses
-    loadRestPoseEntry(character, RestPoses, G.theRestPoseFolder)
-    if "parent" in RestPoses[character].keys():
-        parent = RestPoses[character]["parent"]
-        return parent.lower().replace(" ", "_")
-    else:
-        return character
+    return getRestPoseTable(character).parentCharacter
 
 
 def getParent(character, bname):
-    global Parents
-    parent = getParentCharacter(character)
-    loadRestPoseEntry(parent, Parents, G.theParentsFolder)
-    parents = Parents[parent]["parents"]
+    parents = getRestPoseTable(character).getParents()
     if bname in parents.keys() and parents[bname]:
         return parents[bname]
     else:
@@ -487,6 +543,7 @@ classes = [
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    startPreloadingRestPoses()
 
 
 def unregister():
@@ -287,15 +287,22 @@ class CyclesTree:
     def addGroup(self, classdef, name, col=None, size=0, args=[], force=False):
         if col is None:
             col = self.column
+        from .cgroup import getLibraryGroup, addLibraryGroup
         node = self.addNode("ShaderNodeGroup", col, size=size)
         group = classdef()
-        if name in bpy.data.node_groups.keys() and not force:
+        signature = group.getSignature(args, force)
+        tree = getLibraryGroup(signature)
+        if tree:
+            node.node_tree = tree
+            return node
+        elif name in bpy.data.node_groups.keys() and not force:
             tree = bpy.data.node_groups[name]
-            if group.checkSockets(tree):
+            if "DazSignature" not in tree.keys() and group.checkSockets(tree):
                 node.node_tree = tree
                 return node
         group.create(node, name, self)
         group.addNodes(args)
+        addLibraryGroup(signature, node.node_tree)
         return node
 
 
@@ -320,6 +327,7 @@ class CyclesTree:
             node.node_tree = shell.tree = shell.match.tree
             node.inputs["Influence"].default_value = 1.0
             return node
+        from .cgroup import getLibraryGroup, addLibraryGroup
         if self.type == 'CYCLES':
             from .cgroup import OpaqueShellCyclesGroup, RefractiveShellCyclesGroup
             if shmat.refractive:
@@ -334,8 +342,16 @@ class CyclesTree:
                 group = OpaqueShellPbrGroup(push)
         else:
             raise RuntimeError("Bug Cycles type %s" % self.type)
-        group.create(node, nname, self)
-        group.addNodes((shmat, shell.uv))
+        args = (shmat, shell.uv)
+        signature = group.getSignature(args, False)
+        tree = getLibraryGroup(signature)
+        if tree:
+            node.node_tree = tree
+            shmat.rna = self.material.rna
+        else:
+            group.create(node, nname, self)
+            group.addNodes(args)
+            addLibraryGroup(signature, node.node_tree)
         node.inputs["Influence"].default_value = 1.0
         shell.tree = shmat.tree = node.node_tree
         shmat.geometry = self.material.geometry
@@ -1407,7 +1423,7 @@ class CyclesTree:
                 self.linkVector(self.texco, texnode)
             return texnode
 
-        from .cgroup import LieGroup
+        from .cgroup import LieGroup, getLibraryGroup, addLibraryGroup
         node = self.addNode("ShaderNodeGroup", col)
         node.width = 240
         try:
@@ -1415,9 +1431,16 @@ class CyclesTree:
         except:
             name = "Group"
         group = LieGroup()
-        group.create(node, name, self)
-        self.linkVector(self.texco, node)
-        group.addTextureNodes(assets, maps, colorSpace)
+        signature = group.getSignature((assets, maps, colorSpace, self.material), False)
+        tree = getLibraryGroup(signature)
+        if tree:
+            node.node_tree = tree
+            self.linkVector(self.texco, node)
+        else:
+            group.create(node, name, self)
+            self.linkVector(self.texco, node)
+            group.addTextureNodes(assets, maps, colorSpace)
+            addLibraryGroup(signature, node.node_tree)
         node.inputs["Alpha"].default_value = 1
         self.liegroups.append(node)
         return node
@@ -30,14 +30,14 @@ import bpy
 from mathutils import Vector, Euler, Matrix
 from .error import *
 from .utils import *
-from .animation import ActionOptions
+from .animation import ActionOptions, ReduceOptions
 from .fileutils import SingleFile, TextFile, CsvFile
 
 #------------------------------------------------------------------
 #   Generic FACS importer
 #------------------------------------------------------------------
 
-class FACSImporter(SingleFile, ActionOptions):
+class FACSImporter(SingleFile, ActionOptions, ReduceOptions):
 
     makeNewAction : BoolProperty(
         name = "New Action",
@@ -102,6 +102,7 @@ class FACSImporter(SingleFile, ActionOptions):
             box.prop(self, "neckLowerDist")
             box.prop(self, "abdomenDist")
         self.layout.prop(self, "useEyesRot")
+        ReduceOptions.draw(self, context)
 
 
     def run(self, context):
@@ -111,17 +112,13 @@ class FACSImporter(SingleFile, ActionOptions):
             raise DazError("No rig selected")
         self.facstable = dict((key.lower(), value) for key,value in self.FacsTable.items())
         self.bshapes = []
-        self.bskeys = {}
-        self.hlockeys = {}
-        self.hrotkeys = {}
-        self.leyekeys = {}
-        self.reyekeys = {}
         self.parse()
-        first = list(self.bskeys.values())[0]
-        print("Blendshapes: %d\nKeys: %d" % (len(self.bshapes), len(first)))
+        print("Blendshapes: %d\nKeys: %d" % (len(self.bshapes), len(self.times)))
         if self.makeNewAction and rig.animation_data:
             rig.animation_data.action = None
         self.build(rig)
+        if self.useReduceKeys:
+            self.reduceKeys(rig)
         if self.makeNewAction and rig.animation_data:
             act = rig.animation_data.action
             if act:
@@ -139,20 +136,20 @@ class FACSImporter(SingleFile, ActionOptions):
                 msg += ("  %s\n" % bshape)
             raise DazError(msg)
 
+        from .transform import KeyframeBuffer
         self.setupBones(rig)
         self.scale = rig.DazScale
-        warned = []
-        for t in self.bskeys.keys():
-            frame = self.getFrame(t)
-            self.setBoneFrame(t, frame)
-            for bshape,value in zip(self.bshapes,self.bskeys[t]):
-                prop = self.facstable[bshape]
-                if prop in rig.keys():
-                    rig[prop] = value
-                    rig.keyframe_insert(propRef(prop), frame=frame, group="FACS")
-                elif bshape not in warned:
-                    print("MISS", bshape, prop)
-                    warned.append(bshape)
+        self.keys = KeyframeBuffer(rig)
+        frames = self.getFrame(self.times)
+        self.setBoneFrames(frames)
+        for bshape,values in zip(self.bshapes, self.bskeys.T):
+            prop = self.facstable[bshape]
+            if prop in rig.keys():
+                rig[prop] = float(values[-1])
+                self.keys.addCurves(rig, propRef(prop), "FACS", frames, values)
+            else:
+                print("MISS", bshape, prop)
+        self.keys.write()
 
 
     def setupBones(self, rig):
@@ -178,32 +175,36 @@ class FACSImporter(SingleFile, ActionOptions):
         self.abdomenDist /= distsum
 
 
-    def setBoneFrame(self, t, frame):
-        if self.useHeadLoc:
-            self.hip.location = self.scale*self.hlockeys[t]
-            self.hip.keyframe_insert("location", frame=frame, group="hip")
+    def setBoneFrames(self, frames):
+        if self.useHeadLoc and self.hip:
+            locs = self.scale*self.hlockeys
+            self.hip.location = locs[-1]
+            self.keys.addCurves(self.hip, "location", "hip", frames, locs)
         if self.useHeadRot:
-            self.setRotation(self.head, self.hrotkeys[t], frame, self.headDist)
-            self.setRotation(self.neckUpper, self.hrotkeys[t], frame, self.neckUpperDist)
-            self.setRotation(self.neckLower, self.hrotkeys[t], frame, self.neckLowerDist)
-            self.setRotation(self.abdomen, self.hrotkeys[t], frame, self.abdomenDist)
+            self.setRotations(self.head, self.hrotkeys, frames, self.headDist)
+            self.setRotations(self.neckUpper, self.hrotkeys, frames, self.neckUpperDist)
+            self.setRotations(self.neckLower, self.hrotkeys, frames, self.neckLowerDist)
+            self.setRotations(self.abdomen, self.hrotkeys, frames, self.abdomenDist)
         if self.useEyesRot:
-            self.setRotation(self.leye, self.leyekeys[t], frame)
-            self.setRotation(self.reye, self.reyekeys[t], frame)
+            self.setRotations(self.leye, self.leyekeys, frames)
+            self.setRotations(self.reye, self.reyekeys, frames)
 
 
-    def setRotation(self, pb, euler, frame, fraction=None):
+    def setRotations(self, pb, eulers, frames, fraction=None):
+        from .animation import eulerToMatrices, matricesToQuats, matricesToEulers
         if fraction == 0 or pb is None:
             return
         elif fraction is not None:
-            euler = Euler(fraction*Vector(euler))
-        mat = euler.to_matrix()
+            eulers = fraction*eulers
+        mats = eulerToMatrices(eulers, 'XYZ')
         if pb.rotation_mode == 'QUATERNION':
-            pb.rotation_quaternion = mat.to_quaternion()
-            pb.keyframe_insert("rotation_quaternion", frame=frame, group=pb.name)
+            quats = matricesToQuats(mats)
+            pb.rotation_quaternion = quats[-1]
+            self.keys.addCurves(pb, "rotation_quaternion", pb.name, frames, quats)
         else:
-            pb.rotation_euler = mat.to_euler(pb.rotation_mode)
-            pb.keyframe_insert("rotation_euler", frame=frame, group=pb.name)
+            rots = matricesToEulers(mats, pb.rotation_mode)
+            pb.rotation_euler = rots[-1]
+            self.keys.addCurves(pb, "rotation_euler", pb.name, frames, rots)
 
 
     def getBones(self, bnames, rig):
@@ -313,23 +314,29 @@ class ImportFaceCap(DazOperator, TextFile, IsMeshArmature, FACSImporter):
     # right-eye eulerAngles xy,
     # blendshapes
     def parse(self):
+        import numpy as np
+        rows = []
         with open(self.filepath, "r") as fp:
             for line in fp:
                 line = line.strip()
                 if line[0:3] == "bs,":
                     self.bshapes = [bshape.lower() for bshape in line.split(",")[1:]]
                 elif line[0:2] == "k,":
-                    words = line.split(",")
-                    t = int(words[1])
-                    self.hlockeys[t] = Vector((float(words[2]), -float(words[3]), -float(words[4])))
-                    self.hrotkeys[t] = Euler((D*float(words[5]), D*float(words[6]), D*float(words[7])))
-                    self.leyekeys[t] = Euler((D*float(words[9]), 0.0, D*float(words[8])))
-                    self.reyekeys[t] = Euler((D*float(words[11]), 0.0, D*float(words[10])))
-                    self.bskeys[t] = [float(word) for word in words[12:]]
+                    rows.append(line.split(",")[1:])
                 elif line[0:5] == "info,":
                     pass
                 else:
                     raise DazError("Illegal syntax:\%s     " % line)
+        if not rows:
+            raise DazError("Found no keyframes")
+        data = np.array(rows, dtype=float)
+        self.times = data[:,0]
+        self.hlockeys = data[:,1:4] * (1,-1,-1)
+        self.hrotkeys = D*data[:,4:7]
+        zeros = np.zeros(len(data))
+        self.leyekeys = D*np.stack((data[:,8], zeros, data[:,7]), axis=1)
+        self.reyekeys = D*np.stack((data[:,10], zeros, data[:,9]), axis=1)
+        self.bskeys = data[:,11:]
 
 #------------------------------------------------------------------
 #   Unreal Live Link
@@ -402,6 +409,7 @@ class ImportLiveLink(DazOperator, CsvFile, IsMeshArmature, FACSImporter):
         return t+1
 
     def parse(self):
+        import numpy as np
         from csv import reader
         with open(self.filepath, newline='') as fp:
             lines = list(reader(fp))
@@ -409,16 +417,16 @@ class ImportLiveLink(DazOperator, CsvFile, IsMeshArmature, FACSImporter):
             raise DazError("Found no keyframes")
 
         self.bshapes = [bshape.lower() for bshape in lines[0][2:-9]]
-        for t,line in enumerate(lines[1:]):
-            nums = [float(word) for word in line[2:]]
-            self.bskeys[t] = nums[0:-9]
-            self.hlockeys[t] = Vector((0,0,0))
-            yaw,pitch,roll = nums[-9:-6]
-            self.hrotkeys[t] = Euler((-pitch, -yaw, roll))
-            yaw,pitch,roll = nums[-6:-3]
-            self.leyekeys[t] = Euler((yaw, roll, pitch))
-            yaw,pitch,roll = nums[-3:]
-            self.reyekeys[t] = Euler((yaw, roll, pitch))
+        data = np.array([line[2:] for line in lines[1:]], dtype=float)
+        self.times = np.arange(len(data), dtype=float)
+        self.bskeys = data[:,:-9]
+        self.hlockeys = np.zeros((len(data),3))
+        yaw,pitch,roll = data[:,-9:-6].T
+        self.hrotkeys = np.stack((-pitch, -yaw, roll), axis=1)
+        yaw,pitch,roll = data[:,-6:-3].T
+        self.leyekeys = np.stack((yaw, roll, pitch), axis=1)
+        yaw,pitch,roll = data[:,-3:].T
+        self.reyekeys = np.stack((yaw, roll, pitch), axis=1)
 
         for key in self.bshapes:
             if key not in self.facstable.keys():
@@ -29,7 +29,6 @@ import sys
 import bpy
 
 from mathutils import Vector
-from math import floor
 from .error import *
 from .utils import *
 from .material import WHITE, GREY, BLACK, isWhite, isBlack
@@ -73,6 +72,13 @@ class HairOptions:
         description = "How the strands are oriented in UV space"
     )
 
+    hairTarget : EnumProperty(
+        items = [('PARTICLES', "Particle Hair", "Build particle hair systems on the human"),
+                 ('CURVES', "Hair Curves", "Build a hair curves object (Blender 4.0 and later)")],
+        name = "Output",
+        description = "Type of hair to create",
+        default = 'PARTICLES')
+
     keepMesh : BoolProperty(
         name = "Keep Mesh Hair",
         default = False,
@@ -88,8 +94,15 @@ class HairOptions:
     useSeparateLoose : BoolProperty(
         name = "Separate Loose Parts",
         default = True,
-        description = ("Separate hair mesh into loose parts before doing the conversion.\n" +
-                       "Usually improves performance but can stall for large meshes")
+        description = ("Split hair mesh into loose parts before doing the conversion.\n" +
+                       "Usually improves performance")
+    )
+
+    useParallelStrands : BoolProperty(
+        name = "Parallel Extraction",
+        default = False,
+        description = ("Extract strands from the hair cards in forked worker processes.\n" +
+                       "Linux only, ignored on other platforms")
     )
 
     sparsity : IntProperty(
@@ -120,6 +133,12 @@ class HairOptions:
         description = "Resize hair in blocks of ten afterwards"
     )
 
+    useArcLength : BoolProperty(
+        name = "Arc Length Resampling",
+        default = False,
+        description = "Space resized hair points evenly along the strand instead of evenly by point index"
+    )
+
     # Settings
 
     nViewChildren : IntProperty(
@@ -265,11 +284,7 @@ class HairSystem:
 
 
     def resize(self, size):
-        nstrands = []
-        for strand in self.strands:
-            nstrand = self.resizeStrand(strand, size)
-            nstrands.append(nstrand)
-        return nstrands
+        return resampleStrands(self.strands, size, self.button.useArcLength)
 
 
     def resizeBlock(self):
@@ -280,20 +295,7 @@ class HairSystem:
 
 
     def resizeStrand(self, strand, n):
-        m = len(strand)
-        if m == n:
-            return strand
-        step = (m-1)/(n-1)
-        nstrand = []
-        for i in range(n-1):
-            j = floor(i*step + 1e-4)
-            x = strand[j]
-            y = strand[j+1]
-            eps = i*step - j
-            z = eps*y + (1-eps)*x
-            nstrand.append(z)
-        nstrand.append(strand[m-1])
-        return nstrand
+        return resampleStrands([strand], n, self.button.useArcLength)[0]
 
 
     def build(self, context, ob):
@@ -356,14 +358,27 @@ class HairSystem:
         #print("Hair %s: %.3f %.3f %.3f %.3f %.3f" % (self.name, t2-t1, t3-t2, t4-t3, t5-t4, t6-t5))
 
 
+    def getStrandArray(self, nkeys):
+        import numpy as np
+        nstrands = len(self.strands)
+        coords = np.zeros((nstrands, nkeys, 3), dtype=np.float32)
+        roots = np.array([strand[0] for strand in self.strands], dtype=np.float32)
+        mask = np.array([len(strand) >= nkeys for strand in self.strands], dtype=bool)
+        if mask.any():
+            coords[mask] = [strand[0:nkeys] for strand,ok in zip(self.strands, mask) if ok]
+        return roots, coords, mask
+
+
     def buildStrands(self, psys):
-        for m,hair in enumerate(psys.particles):
-            verts = self.strands[m]
-            hair.location = verts[0]
-            if len(verts) < len(hair.hair_keys):
-                continue
-            for n,v in enumerate(hair.hair_keys):
-                v.co = verts[n]
+        import numpy as np
+        particles = psys.particles
+        if len(particles) == 0:
+            return
+        nkeys = len(particles[0].hair_keys)
+        roots, coords, mask = self.getStrandArray(nkeys)
+        particles.foreach_set("location", roots[0:len(particles)].ravel())
+        for m in np.flatnonzero(mask[0:len(particles)]):
+            particles[m].hair_keys.foreach_set("co", coords[m].ravel())
 
 
     def buildFinish(self, context, psys, hum):
@@ -390,96 +405,192 @@ class HairSystem:
         deflector = findDeflector(hum)
 
 #-------------------------------------------------------------
-#   Tesselator class
+#   Strand resampling
 #-------------------------------------------------------------
 
-class Tesselator:
-    def unTesselateFaces(self, context, hair, btn):
-        self.squashFaces(hair)
-        self.removeDoubles(context, hair, btn)
-        deletes = self.checkTesselation(hair)
-        if deletes:
-            self.mergeRemainingFaces(hair, btn)
-
-
-    def squashFaces(self, hair):
-        verts = hair.data.vertices
-        for f in hair.data.polygons:
-            fverts = [verts[vn] for vn in f.vertices]
-            if len(fverts) == 4:
-                v1,v2,v3,v4 = fverts
-                if (v1.co-v2.co).length < (v2.co-v3.co).length:
-                    v2.co = v1.co
-                    v4.co = v3.co
-                else:
-                    v3.co = v2.co
-                    v4.co = v1.co
-
-
-    def removeDoubles(self, context, hair, btn):
-        activateObject(context, hair)
-        threshold = 0.001*btn.scale
-        setMode('EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.mesh.remove_doubles(threshold=threshold)
-        bpy.ops.mesh.select_all(action='DESELECT')
-        setMode('OBJECT')
+def resampleStrands(strands, n, useArcLength=False):
+    import numpy as np
+    # Strands with the same number of points are resampled together
+    groups = {}
+    for idx,strand in enumerate(strands):
+        m = len(strand)
+        if m not in groups.keys():
+            groups[m] = []
+        groups[m].append(idx)
+    nstrands = list(strands)
+    for m,idxs in groups.items():
+        if m == n:
+            continue
+        coords = np.array([strands[idx] for idx in idxs], dtype=float)
+        if useArcLength:
+            ncoords = resampleByLength(coords, n)
+        else:
+            ncoords = resampleByIndex(coords, n)
+        for idx,ncoord in zip(idxs, ncoords):
+            nstrands[idx] = ncoord
+    return nstrands
+
+
+def resampleByIndex(coords, n):
+    import numpy as np
+    k,m,_ = coords.shape
+    if m < 2:
+        return np.repeat(coords[:,0:1], n, axis=1)
+    t = np.arange(n-1)*((m-1)/(n-1))
+    j = np.floor(t + 1e-4).astype(int)
+    eps = (t - j)[None,:,None]
+    ncoords = np.empty((k,n,3))
+    ncoords[:,0:n-1] = eps*coords[:,j+1] + (1-eps)*coords[:,j]
+    ncoords[:,n-1] = coords[:,m-1]
+    return ncoords
+
+
+def resampleByLength(coords, n):
+    import numpy as np
+    k,m,_ = coords.shape
+    if m < 2:
+        return np.repeat(coords[:,0:1], n, axis=1)
+    seglens = np.linalg.norm(coords[:,1:] - coords[:,:-1], axis=2)
+    s = np.zeros((k,m))
+    np.cumsum(seglens, axis=1, out=s[:,1:])
+    total = s[:,-1:]
+    degenerate = (total[:,0] <= 0)
+    total[degenerate] = 1
+    s /= total
+    s[degenerate] = np.linspace(0, 1, m)
+    # Search all strands at once by offsetting each row into its own interval
+    offsets = 2*np.arange(k)[:,None]
+    u = np.linspace(0, 1, n)[None,:] + offsets
+    j = np.searchsorted((s + offsets).ravel(), u.ravel(), side='right') - 1
+    j = j.reshape(k,n) - m*np.arange(k)[:,None]
+    j = np.clip(j, 0, m-2)
+    rows = np.arange(k)[:,None]
+    s0 = s[rows,j]
+    ds = s[rows,j+1] - s0
+    eps = np.where(ds > 0, (u - offsets - s0)/np.where(ds > 0, ds, 1), 0)
+    eps = np.clip(eps, 0, 1)[:,:,None]
+    return eps*coords[rows,j+1] + (1-eps)*coords[rows,j]
 
+#-------------------------------------------------------------
+#   Hair curves
+#-------------------------------------------------------------
 
-    def checkTesselation(self, hair):
-        # Check that there are only pure lines
-        from .tables import getVertEdges
-        vertedges = getVertEdges(hair)
-        nverts = len(hair.data.vertices)
-        print("Check hair", hair.name, nverts)
-        deletes = []
-        for vn,v in enumerate(hair.data.vertices):
-            ne = len(vertedges[vn])
-            if ne > 2:
-                #v.select = True
-                deletes.append(vn)
-        print("Number of vertices to delete", len(deletes))
-        return deletes
-
-
-    def mergeRemainingFaces(self, hair, btn):
-        for f in hair.data.polygons:
-            fverts = [hair.data.vertices[vn] for vn in f.vertices]
-            r0 = fverts[0].co
-            for v in fverts:
-                v.co = r0
-                v.select = True
-        threshold = 0.001*btn.scale
-        setMode('EDIT')
-        bpy.ops.mesh.remove_doubles(threshold=threshold)
-        setMode('OBJECT')
+def setCurveAttribute(hc, aname, atype, prop, values):
+    attr = hc.attributes.get(aname)
+    if attr is None:
+        attr = hc.attributes.new(aname, atype, 'CURVE')
+    attr.data.foreach_set(prop, values)
 
 
-    def findStrands(self, hair):
-        def getEdge(pair, mnum):
-            return [min(pair), max(pair), mnum]
+def getRootUvs(hum, roots):
+    import numpy as np
+    me = hum.data
+    uvlayer = me.uv_layers.active
+    if uvlayer is None:
+        return None
+    nverts = len(me.vertices)
+    nloops = len(me.loops)
+    nfaces = len(me.polygons)
+    vcoords = np.zeros(3*nverts, dtype=np.float32)
+    me.vertices.foreach_get("co", vcoords)
+    vcoords = vcoords.reshape(-1,3)
+    loopverts = np.zeros(nloops, dtype=np.int32)
+    me.loops.foreach_get("vertex_index", loopverts)
+    loopuvs = np.zeros(2*nloops, dtype=np.float32)
+    uvlayer.data.foreach_get("uv", loopuvs)
+    loopuvs = loopuvs.reshape(-1,2)
+    fstarts = np.zeros(nfaces, dtype=np.int32)
+    me.polygons.foreach_get("loop_start", fstarts)
+    ftotals = np.zeros(nfaces, dtype=np.int32)
+    me.polygons.foreach_get("loop_total", ftotals)
+
+    hits = np.full(len(roots), -1, dtype=np.int64)
+    locs = np.zeros((len(roots),3))
+    for n,co in enumerate(roots):
+        ok,loc,_,fn = hum.closest_point_on_mesh(Vector(co))
+        if ok and fn >= 0:
+            hits[n] = fn
+            locs[n] = loc
+    uvs = np.zeros((len(roots),2), dtype=np.float32)
+    found = np.nonzero(hits >= 0)[0]
+    if len(found) == 0:
+        return uvs
+
+    # Mean value weights of loc in its face, as poly_3d_calc computes them.
+    # Faces are padded to the largest corner count, padding gets zero weight.
+    fns = hits[found]
+    first = fstarts[fns].astype(np.int64)[:,None]
+    totals = ftotals[fns].astype(np.int64)[:,None]
+    corners = np.arange(int(totals.max()))[None,:]
+    valid = (corners < totals)
+    loops = first + corners % totals
+    nexts = first + (corners+1) % totals
+    vecs = vcoords[loopverts[loops]] - locs[found][:,None,:]
+    nvecs = vcoords[loopverts[nexts]] - locs[found][:,None,:]
+    dists = np.linalg.norm(vecs, axis=2)
+    ndists = np.linalg.norm(nvecs, axis=2)
+    cross = np.linalg.norm(np.cross(vecs, nvecs), axis=2)
+    denom = dists*ndists + np.sum(vecs*nvecs, axis=2)
+    eps = 1e-8
+    onvert = valid & (dists < eps)
+    onedge = valid & ~onvert & (denom < eps)
+    halftan = np.where(valid & (denom > eps), cross/np.maximum(denom, eps), 0)
+    prevs = (corners-1) % totals
+    weights = (np.take_along_axis(halftan, prevs, axis=1) + halftan)/np.maximum(dists, eps)
+    weights[~valid] = 0
+
+    # Points on an edge are interpolated along the edge
+    rows,cols = np.nonzero(onedge)
+    weights[rows] = 0
+    nextcols = (cols+1) % totals[rows,0]
+    length = dists[rows,cols] + ndists[rows,cols]
+    weights[rows,cols] = ndists[rows,cols]/length
+    weights[rows,nextcols] = dists[rows,cols]/length
+    # Points on a corner take its uv
+    rows,cols = np.nonzero(onvert)
+    weights[rows] = 0
+    weights[rows,cols] = 1
+
+    weights /= np.sum(weights, axis=1)[:,None]
+    uvs[found] = np.einsum("ij,ijk->ik", weights, loopuvs[loops])
+    return uvs
+
+#-------------------------------------------------------------
+#   Tesselator class
+#-------------------------------------------------------------
 
-        pgs = hair.data.DazMatNums
-        if len(pgs) >= len(hair.data.edges):
-            edges = [getEdge(e.vertices, pgs[e.index].a) for e in hair.data.edges]
+class Tesselator:
+    def findStrands(self, hair, isTube, threshold):
+        import numpy as np
+        from .topology import getMeshTopology
+        from .hairstrands import collapseTubes, findChains
+        me = hair.data
+        topo = getMeshTopology(me)
+        coords = np.zeros(3*len(me.vertices), dtype=float)
+        me.vertices.foreach_get("co", coords)
+        coords = coords.reshape(-1,3)
+        if isTube:
+            coords,edges = collapseTubes(coords, topo.faceverts, topo.offsets, threshold)
+            mnums = np.zeros(len(coords), dtype=int)
         else:
-            edges = [getEdge(e.vertices, 0) for e in hair.data.edges]
-        edges.sort()
-        plines = []
-        v0 = -1
-        for v1,v2,mnum in edges:
-            if v1 == v0:
-                pline.append(v2)
-            else:
-                pline = [v1,v2]
-                plines.append((mnum,pline))
-            v0 = v2
-        strands = []
-        verts = hair.data.vertices
-        for mnum,pline in plines:
-            strand = [verts[vn].co for vn in pline]
-            strands.append((mnum,strand))
-        return strands
+            edges = topo.edges
+            mnums = self.getVertMatNums(me, edges)
+        print("Check hair", hair.name, len(coords))
+        chains,nbranches = findChains(len(coords), edges)
+        if nbranches:
+            print("Strands split at %d branching vertices" % nbranches)
+        return [(int(mnums[chain[0]]), coords[chain].tolist()) for chain in chains]
+
+
+    def getVertMatNums(self, me, edges):
+        import numpy as np
+        mnums = np.zeros(len(me.vertices), dtype=int)
+        pgs = me.DazMatNums
+        if len(edges) and len(pgs) >= len(edges):
+            emnums = np.array([pg.a for pg in pgs][0:len(edges)], dtype=int)
+            mnums[edges[:,1]] = emnums
+            mnums[edges[:,0]] = emnums
+        return mnums
 
 #-------------------------------------------------------------
 #   Make Hair
@@ -549,10 +660,12 @@ class DAZ_OT_MakeHair(DazPropsOperator, CombineHair, IsMesh, HairOptions):
         box = col.box()
         box.label(text="Create")
         box.prop(self, "strandType", expand=True)
+        box.prop(self, "hairTarget", expand=True)
         multimat = True
         if self.strandType == 'SHEET':
             box.prop(self, "strandOrientation")
             box.prop(self, "useSeparateLoose")
+            box.prop(self, "useParallelStrands")
         elif self.strandType == 'TUBE':
             multimat = False
         box.prop(self, "keepMesh")
@@ -560,6 +673,7 @@ class DAZ_OT_MakeHair(DazPropsOperator, CombineHair, IsMesh, HairOptions):
         box.separator()
         box.prop(self, "resizeHair")
         box.prop(self, "size")
+        box.prop(self, "useArcLength")
         box.prop(self, "resizeInBlocks")
         box.prop(self, "sparsity")
 
@@ -638,50 +752,37 @@ class DAZ_OT_MakeHair(DazPropsOperator, CombineHair, IsMesh, HairOptions):
 
         activateObject(context, hair)
         nhairfaces = len(hair.data.polygons)
-        setMode('EDIT')
-        bpy.ops.mesh.select_mode(type='FACE')
-        bpy.ops.mesh.select_all(action='DESELECT')
 
         t2 = perf_counter()
         self.clocks.append(("Initialize", t2-t1))
         print("Start conversion")
         hsystems = {}
         if self.strandType == 'SHEET':
-            hairs = []
-            if self.useSeparateLoose:
-                #bpy.ops.mesh.separate(type='LOOSE')
-                bpy.ops.daz.separate_loose_parts()
-                print("Loose parts separated")
-            setMode('OBJECT')
-            hname = hair.name
-            if (len(hname) >= 4 and hname[-4] == "." and hname[-3:].isdigit()):
-                hname = hname[:-4]
+            hairs = [hair]
+            from .hairstrands import HairMesh, extractAllStrands
+            hmesh = HairMesh(hair, self.strandOrientation)
+            parts = hmesh.getParts(self.useSeparateLoose)
+            print("%d loose parts found" % len(parts))
+            parts = [faces.tolist() for faces in parts[self.sparsity-1::self.sparsity]]
+            results = extractAllStrands(hmesh, parts, self.useParallelStrands)
             haircount = 0
-            hairs = [hair for hair in getSelectedMeshes(context)
-                     if (hair.name.startswith(hname) and
-                         hair != hum)]
-            count = 0
-            for hair in hairs:
-                count += 1
-                if count % self.sparsity != 0:
-                    continue
-                hsyss,hcount = self.makeHairSystems(context, hum, hair)
+            selected = []
+            for mnum,rects,faces,nonquads in results:
+                hcount = -1
+                for coords in rects:
+                    strands = [(mnum,strand) for strand in coords]
+                    hcount = self.addStrands(hum, strands, hsystems, hcount)
                 haircount += hcount
-                self.combineHairSystems(hsystems, hsyss)
-                if count % 10 == 0:
-                    sys.stdout.write(".")
-                    sys.stdout.flush()
+                selected += faces
+                self.nonquads += nonquads
+            hmesh.selectFaces(hair, selected)
             t5 = perf_counter()
             self.clocks.append(("Make hair systems", t5-t2))
         else:
             hairs = [hair]
-            setMode('OBJECT')
             tess = Tesselator()
-            if self.strandType == 'LINE':
-                pass
-            elif self.strandType == 'TUBE':
-                tess.unTesselateFaces(context, hair, self)
-            strands = tess.findStrands(hair)
+            isTube = (self.strandType == 'TUBE')
+            strands = tess.findStrands(hair, isTube, 0.001*self.scale)
             haircount = self.addStrands(hum, strands, hsystems, -1)
             t5 = perf_counter()
             self.clocks.append(("Make hair systems", t5-t2))
@@ -700,15 +801,7 @@ class DAZ_OT_MakeHair(DazPropsOperator, CombineHair, IsMesh, HairOptions):
         t7 = perf_counter()
         self.clocks.append(("Make Hair", t7-t6))
         if self.keepMesh:
-            if self.strandType == 'SHEET':
-                activateObject(context, hair)
-                selectObjects(context, hairs)
-                bpy.ops.object.join()
-                activateObject(context, hum)
-                t8 = perf_counter()
-                self.clocks.append(("Rejoined mesh hairs", t8-t7))
-            else:
-                t8 = t7
+            t8 = t7
         else:
             for hair in hairs:
                 hair.parent = None
@@ -724,6 +817,8 @@ class DAZ_OT_MakeHair(DazPropsOperator, CombineHair, IsMesh, HairOptions):
 
 
     def makeHairs(self, context, hsystems, hum):
+        if self.hairTarget == 'CURVES':
+            return self.makeHairCurves(context, hsystems, hum)
         print("Make particle hair")
         activateObject(context, hum)
         for hsys in hsystems.values():
@@ -733,75 +828,52 @@ class DAZ_OT_MakeHair(DazPropsOperator, CombineHair, IsMesh, HairOptions):
         print("Done")
 
 
-    def findMeshRects(self, hair):
-        from .tables import getVertFaces, findNeighbors
-        #print("Find neighbors")
-        self.faceverts, self.vertfaces = getVertFaces(hair)
-        self.nfaces = len(hair.data.polygons)
-        if not self.nfaces:
-            return None
-            raise DazError("Hair has no faces")
-        mneighbors = findNeighbors(range(self.nfaces), self.faceverts, self.vertfaces)
-        self.centers, self.uvcenters = self.findCenters(hair)
-
-        #print("Collect rects")
-        mfaces = [(f.index,f.vertices) for f in hair.data.polygons]
-        mrects,_,_ = self.collectRects(mfaces, mneighbors)
-        return mrects
-
-
-    def findTexRects(self, hair, mrects):
-        from .tables import getVertFaces, findNeighbors, findTexVerts
-        #print("Find texverts")
-        self.texverts, self.texfaces = findTexVerts(hair, self.vertfaces)
-        #print("Find tex neighbors", len(self.texverts), self.nfaces, len(self.texfaces))
-        # Improve
-        _,self.texvertfaces = getVertFaces(hair, self.texverts, None, self.texfaces)
-        tneighbors = findNeighbors(range(self.nfaces), self.texfaces, self.texvertfaces)
-
-        rects = []
-        #print("Collect texrects")
-        for mverts,mfaces in mrects:
-            texfaces = [(fn,self.texfaces[fn]) for fn in mfaces]
-            nn = [(fn,tneighbors[fn]) for fn in mfaces]
-            rects2,clusters,fclusters = self.collectRects(texfaces, tneighbors)
-            for rect in rects2:
-                rects.append(rect)
-        return rects
-
-
-    def makeHairSystems(self, context, hum, hair):
-        from .tables import getVertFaces, findNeighbors
-        if len(hair.data.polygons) > 0:
-            mnum = hair.data.polygons[0].material_index
-        else:
-            mnum = 0
-        mrects = self.findMeshRects(hair)
-        if mrects is None:
-            return {}, 0
-        trects = self.findTexRects(hair, mrects)
-        #print("Sort columns")
-        haircount = -1
-        setActiveObject(context, hair)
-        hsystems = {}
-        verts = range(len(hair.data.vertices))
-        for _,tfaces in trects:
-            if not self.quadsOnly(hair, tfaces):
-                continue
-            _,vertfaces = getVertFaces(None, verts, tfaces, self.faceverts)
-            neighbors = findNeighbors(tfaces, self.faceverts, vertfaces)
-            if neighbors is None:
-                continue
-            first, corner, boundary, bulk = self.findStartingPoint(hair, neighbors, self.uvcenters)
-            if first is None:
-                continue
-            self.selectFaces(hair, tfaces)
-            columns = self.sortColumns(first, corner, boundary, bulk, neighbors, self.uvcenters)
-            if columns:
-                coords = self.getColumnCoords(columns, self.centers)
-                strands = [(mnum,strand) for strand in coords]
-                haircount = self.addStrands(hum, strands, hsystems, haircount)
-        return hsystems, haircount
+    def makeHairCurves(self, context, hsystems, hum):
+        import numpy as np
+        print("Make hair curves")
+        if not hasattr(bpy.data, "hair_curves"):
+            raise DazError("Hair curves require Blender 4.0 or later")
+        strands = []
+        mnums = []
+        for hsys in hsystems.values():
+            if hsys.mnum < len(self.materials):
+                mnum = hsys.mnum
+            else:
+                mnum = 0
+            strands += hsys.strands
+            mnums += len(hsys.strands)*[mnum]
+        sizes = np.array([len(strand) for strand in strands], dtype=np.int32)
+        coords = np.concatenate([np.asarray(strand, dtype=np.float32) for strand in strands])
+        starts = np.zeros(len(sizes), dtype=np.int32)
+        np.cumsum(sizes[:-1], out=starts[1:])
+
+        hc = bpy.data.hair_curves.new("Hair")
+        if not hasattr(hc, "add_curves"):
+            bpy.data.hair_curves.remove(hc)
+            raise DazError("Hair curves require Blender 4.0 or later")
+        hc.add_curves(sizes.tolist())
+        hc.points.foreach_set("position", coords.ravel())
+
+        # Radius goes linearly from root to tip
+        params = np.arange(len(coords)) - np.repeat(starts, sizes)
+        params = params / np.repeat(np.maximum(sizes-1, 1), sizes)
+        root = 0.1*self.rootRadius*hum.DazScale
+        tip = 0.1*self.tipRadius*hum.DazScale
+        hc.points.foreach_set("radius", (root + params*(tip-root)).astype(np.float32))
+
+        for mat in self.materials:
+            hc.materials.append(mat)
+        setCurveAttribute(hc, "material_index", 'INT', "value", np.array(mnums, dtype=np.int32))
+        uvs = getRootUvs(hum, coords[starts])
+        if uvs is not None:
+            setCurveAttribute(hc, "surface_uv_coordinate", 'FLOAT2', "vector", uvs.ravel())
+            hc.surface_uv_map = hum.data.uv_layers.active.name
+        hc.surface = hum
+
+        ob = bpy.data.objects.new(hc.name, hc)
+        getCollection(hum).objects.link(ob)
+        ob.parent = hum
+        print("Done")
 
 
     def getStrand(self, strand):
@@ -827,212 +899,6 @@ class DAZ_OT_MakeHair(DazPropsOperator, CombineHair, IsMesh, HairOptions):
             nsystems[key].strands += nstrands
         return nsystems
 
-    #-------------------------------------------------------------
-    #   Collect rectangles
-    #-------------------------------------------------------------
-
-    def collectRects(self, faceverts, neighbors):
-        #fclusters = dict([(fn,-1) for fn,_ in faceverts])
-        fclusters = {}
-        for fn,_ in faceverts:
-            fclusters[fn] = -1
-            for nn in neighbors[fn]:
-                fclusters[nn] = -1
-        clusters = {-1 : -1}
-        nclusters = 0
-
-        for fn,_ in faceverts:
-            fncl = [self.deref(nn, fclusters, clusters) for nn in neighbors[fn] if nn < fn]
-            if fncl == []:
-                cn = clusters[cn] = nclusters
-                nclusters += 1
-            else:
-                cn = min(fncl)
-                for cn1 in fncl:
-                    clusters[cn1] = cn
-            fclusters[fn] = cn
-
-        for fn,_ in faceverts:
-            fclusters[fn] = self.deref(fn, fclusters, clusters)
-
-        rects = []
-        for cn in clusters.keys():
-            if cn == clusters[cn]:
-                faces = [fn for fn,_ in faceverts if fclusters[fn] == cn]
-                vertsraw = [vs for fn,vs in faceverts if fclusters[fn] == cn]
-                vstruct = {}
-                for vlist in vertsraw:
-                    for vn in vlist:
-                        vstruct[vn] = True
-                verts = list(vstruct.keys())
-                verts.sort()
-                rects.append((verts, faces))
-                if len(rects) > 1000:
-                    print("Too many rects")
-                    return rects, clusters, fclusters
-
-        return rects, clusters, fclusters
-
-
-    def deref(self, fn, fclusters, clusters):
-        cn = fclusters[fn]
-        updates = []
-        while cn != clusters[cn]:
-            updates.append(cn)
-            cn = clusters[cn]
-        for nn in updates:
-            clusters[nn] = cn
-        fclusters[fn] = cn
-        return cn
-
-    #-------------------------------------------------------------
-    #   Find centers
-    #-------------------------------------------------------------
-
-    def findCenters(self, ob):
-        vs = ob.data.vertices
-        uvs = ob.data.uv_layers.active.data
-        centers = {}
-        uvcenters = {}
-        m = 0
-        for f in ob.data.polygons:
-            f.select = True
-            fn = f.index
-            if len(f.vertices) == 4:
-                vn0,vn1,vn2,vn3 = f.vertices
-                centers[fn] = (vs[vn0].co+vs[vn1].co+vs[vn2].co+vs[vn3].co)/4
-                uvcenters[fn] = (uvs[m].uv+uvs[m+1].uv+uvs[m+2].uv+uvs[m+3].uv)/4
-                m += 4
-            else:
-                vn0,vn1,vn2 = f.vertices
-                centers[fn] = (vs[vn0].co+vs[vn1].co+vs[vn2].co)/4
-                uvcenters[fn] = (uvs[m].uv+uvs[m+1].uv+uvs[m+2].uv)/4
-                m += 3
-            f.select = False
-        if self.strandOrientation == 'TOP':
-            pass
-        elif self.strandOrientation == 'BOTTOM':
-            uvcenters = dict([(fn,Vector((u[0], -u[1]))) for fn,u in uvcenters.items()])
-        elif self.strandOrientation == 'LEFT':
-            uvcenters = dict([(fn,Vector((-u[1], -u[0]))) for fn,u in uvcenters.items()])
-        elif self.strandOrientation == 'RIGHT':
-            uvcenters = dict([(fn,Vector((u[1], u[0]))) for fn,u in uvcenters.items()])
-        return centers, uvcenters
-
-    #-------------------------------------------------------------
-    #   Find starting point
-    #-------------------------------------------------------------
-
-    def findStartingPoint(self, ob, neighbors, uvcenters):
-        types = dict([(n,[]) for n in range(1,5)])
-        for fn,neighs in neighbors.items():
-            nneighs = len(neighs)
-            if nneighs == 0:
-                return None,None,None,None
-            elif nneighs >= 5:
-                sys.stdout.write("N")
-                return None,None,None,None
-            types[nneighs].append(fn)
-
-        singlets = [(uvcenters[fn][0]+uvcenters[fn][1], fn) for fn in types[1]]
-        singlets.sort()
-        if len(singlets) > 0:
-            if len(singlets) != 2:
-                sys.stdout.write("S")
-                return None,None,None,None
-            if (types[3] != [] or types[4] != []):
-                sys.stdout.write("T")
-                return None,None,None,None
-            first = singlets[0][1]
-            corner = types[1]
-            boundary = types[2]
-            bulk = types[3]
-        else:
-            doublets = [(uvcenters[fn][0]+uvcenters[fn][1], fn) for fn in types[2]]
-            doublets.sort()
-            if len(doublets) > 4:
-                sys.stdout.write(">")
-                self.selectFaces(ob, [fn for _,fn in doublets])
-                return None,None,None,None
-            if len(doublets) < 4:
-                if len(doublets) == 2:
-                    sys.stdout.write("2")
-                    self.selectFaces(ob, neighbors.keys())
-                return None,None,None,None
-            first = doublets[0][1]
-            corner = types[2]
-            boundary = types[3]
-            bulk = types[4]
-
-        return first, corner, boundary, bulk
-
-    #-------------------------------------------------------------
-    #   Sort columns
-    #-------------------------------------------------------------
-
-    def sortColumns(self, first, corner, boundary, bulk, neighbors, uvcenters):
-        column = self.getDown(first, neighbors, corner, boundary, uvcenters)
-        columns = [column]
-        if len(corner) <= 2:
-            return columns
-        fn = first
-        n = 0
-        while (True):
-            n += 1
-            horizontal = [(uvcenters[nb][0], nb) for nb in neighbors[fn]]
-            horizontal.sort()
-            fn = horizontal[-1][1]
-            if n > 50:
-                return columns
-            elif fn in corner:
-                column = self.getDown(fn, neighbors, corner, boundary, uvcenters)
-                columns.append(column)
-                return columns
-            elif fn in boundary:
-                column = self.getDown(fn, neighbors, boundary, bulk, uvcenters)
-                columns.append(column)
-            else:
-                print("Hair bug", fn)
-                return None
-                raise DazError("Hair bug")
-        print("Sorted")
-
-
-    def getDown(self, top, neighbors, boundary, bulk, uvcenters):
-        column = [top]
-        fn = top
-        n = 0
-        while (True):
-            n += 1
-            vertical = [(uvcenters[nb][1], nb) for nb in neighbors[fn]]
-            vertical.sort()
-            fn = vertical[-1][1]
-            if fn in boundary or n > 500:
-                column.append(fn)
-                column.reverse()
-                return column
-            else:
-                column.append(fn)
-
-    #-------------------------------------------------------------
-    #   Get column coords
-    #-------------------------------------------------------------
-
-    def getColumnCoords(self, columns, centers):
-        #print("Get column coords")
-        length = len(columns[0])
-        hcoords = []
-        short = False
-        for column in columns:
-            if len(column) < length:
-                length = len(column)
-                short = True
-            hcoord = [centers[fn] for fn in column]
-            hcoords.append(hcoord)
-        if short:
-            hcoords = [hcoord[0:length] for hcoord in hcoords]
-        return hcoords
-
     #-------------------------------------------------------------
     #   Clear hair
     #-------------------------------------------------------------
@@ -1071,21 +937,6 @@ class DAZ_OT_MakeHair(DazPropsOperator, CombineHair, IsMesh, HairOptions):
             hum.data.materials.append(mat)
             self.materials = [mat]
 
-
-    def quadsOnly(self, ob, faces):
-        for fn in faces:
-            f = ob.data.polygons[fn]
-            if len(f.vertices) != 4:
-                #print("  Face %d has %s corners" % (fn, len(f.vertices)))
-                self.nonquads.append(fn)
-                return False
-        return True
-
-
-    def selectFaces(self, ob, faces):
-        for fn in faces:
-            ob.data.polygons[fn].select = True
-
 # ---------------------------------------------------------------------
 #
 # ---------------------------------------------------------------------
@@ -1281,6 +1132,7 @@ class DAZ_OT_CombineHairs(DazOperator, CombineHair, HairUpdater, Selector, HairO
 
     def draw(self, context):
         self.layout.prop(self, "size")
+        self.layout.prop(self, "useArcLength")
         Selector.draw(self, context)
 
     def invoke(self, context, event):
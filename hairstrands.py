@@ -0,0 +1,511 @@
+# Copyright (c) 2016-2021, Thomas Larsson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# The views and conclusions contained in the software and documentation are those
+# of the authors and should not be interpreted as representing official policies,
+# either expressed or implied, of the FreeBSD Project.
+
+import os
+import sys
+from .tables import getVertFaces, findNeighbors, findFaceTexVerts, findLooseParts
+
+#-------------------------------------------------------------
+#   Strand extraction for sheet hair.
+#   Only plain arrays and lists are used here, no bpy access,
+#   so that hair cards can be processed in worker processes.
+#-------------------------------------------------------------
+
+class HairMesh:
+    def __init__(self, ob, orientation):
+        import numpy as np
+        me = ob.data
+        self.nverts = nverts = len(me.vertices)
+        self.nfaces = nfaces = len(me.polygons)
+        nloops = len(me.loops)
+        nedges = len(me.edges)
+        coords = np.zeros(3*nverts, dtype=np.float32)
+        me.vertices.foreach_get("co", coords)
+        coords = coords.reshape(-1,3)
+        self.edges = np.zeros(2*nedges, dtype=np.int32)
+        me.edges.foreach_get("vertices", self.edges)
+        self.edges = self.edges.reshape(-1,2)
+        self.loopverts = np.zeros(nloops, dtype=np.int32)
+        me.loops.foreach_get("vertex_index", self.loopverts)
+        self.loopstarts = np.zeros(nfaces, dtype=np.int32)
+        me.polygons.foreach_get("loop_start", self.loopstarts)
+        mnums = np.zeros(nfaces, dtype=np.int32)
+        me.polygons.foreach_get("material_index", mnums)
+        self.mnums = mnums.tolist()
+        uvs = np.zeros(2*nloops, dtype=np.float32)
+        me.uv_layers.active.data.foreach_get("uv", uvs)
+        uvs = uvs.reshape(-1,2)
+        self.faceverts = [fverts.tolist() for fverts in np.split(self.loopverts, self.loopstarts[1:])]
+        self.uvs = uvs.tolist()
+
+        # Face centers are corner sums divided by four, triangles included
+        if nfaces:
+            centers = np.add.reduceat(coords[self.loopverts], self.loopstarts)/4
+            uvcenters = np.add.reduceat(uvs, self.loopstarts)/4
+        else:
+            centers = np.zeros((0,3))
+            uvcenters = np.zeros((0,2))
+        u = uvcenters[:,0].copy()
+        v = uvcenters[:,1].copy()
+        if orientation == 'BOTTOM':
+            uvcenters[:,1] = -v
+        elif orientation == 'LEFT':
+            uvcenters[:,0] = -v
+            uvcenters[:,1] = -u
+        elif orientation == 'RIGHT':
+            uvcenters[:,0] = v
+            uvcenters[:,1] = u
+        self.centers = centers.tolist()
+        self.uvcenters = uvcenters.tolist()
+
+
+    def getParts(self, separate):
+        import numpy as np
+        if not separate or self.nfaces == 0:
+            return [np.arange(self.nfaces)]
+        labels = findLooseParts(self.nverts, self.edges)
+        flabels = labels[self.loopverts[self.loopstarts]]
+        order = np.argsort(flabels, kind="stable")
+        splits = np.flatnonzero(np.diff(flabels[order])) + 1
+        return np.split(order, splits)
+
+
+    def selectFaces(self, ob, faces):
+        import numpy as np
+        select = np.zeros(self.nfaces, dtype=bool)
+        select[faces] = True
+        ob.data.polygons.foreach_set("select", select)
+
+#-------------------------------------------------------------
+#   Strand extractor
+#-------------------------------------------------------------
+
+class StrandExtractor:
+    def __init__(self, hmesh):
+        self.hmesh = hmesh
+        self.faceverts = hmesh.faceverts
+        self.selected = []
+        self.nonquads = []
+
+
+    def extractStrands(self, faces):
+        hmesh = self.hmesh
+        if faces:
+            mnum = hmesh.mnums[faces[0]]
+        else:
+            mnum = 0
+        mrects = self.findMeshRects(faces)
+        if mrects is None:
+            return mnum, []
+        trects = self.findTexRects(faces, mrects)
+        #print("Sort columns")
+        rects = []
+        for _,tfaces in trects:
+            if not self.quadsOnly(tfaces):
+                continue
+            _,vertfaces = getVertFaces(None, self.partverts, tfaces, self.faceverts)
+            neighbors = findNeighbors(tfaces, self.faceverts, vertfaces)
+            if neighbors is None:
+                continue
+            first, corner, boundary, bulk = self.findStartingPoint(neighbors, hmesh.uvcenters)
+            if first is None:
+                continue
+            self.selectFaces(tfaces)
+            columns = self.sortColumns(first, corner, boundary, bulk, neighbors, hmesh.uvcenters)
+            if columns:
+                rects.append(self.getColumnCoords(columns, hmesh.centers))
+        return mnum, rects
+
+
+    def findMeshRects(self, faces):
+        #print("Find neighbors")
+        self.nfaces = len(faces)
+        if not self.nfaces:
+            return None
+        verts = set()
+        for fn in faces:
+            verts.update(self.faceverts[fn])
+        self.partverts = sorted(verts)
+        _,self.vertfaces = getVertFaces(None, self.partverts, faces, self.faceverts)
+        mneighbors = findNeighbors(faces, self.faceverts, self.vertfaces)
+
+        #print("Collect rects")
+        mfaces = [(fn,self.faceverts[fn]) for fn in faces]
+        mrects,_,_ = self.collectRects(mfaces, mneighbors)
+        return mrects
+
+
+    def findTexRects(self, faces, mrects):
+        hmesh = self.hmesh
+        #print("Find texverts")
+        self.texverts, self.texfaces = findFaceTexVerts(faces, self.faceverts, self.vertfaces, hmesh.uvs, hmesh.loopstarts)
+        #print("Find tex neighbors", len(self.texverts), self.nfaces, len(self.texfaces))
+        # Improve
+        _,self.texvertfaces = getVertFaces(None, self.texverts, faces, self.texfaces)
+        tneighbors = findNeighbors(faces, self.texfaces, self.texvertfaces)
+
+        rects = []
+        #print("Collect texrects")
+        for mverts,mfaces in mrects:
+            texfaces = [(fn,self.texfaces[fn]) for fn in mfaces]
+            nn = [(fn,tneighbors[fn]) for fn in mfaces]
+            rects2,clusters,fclusters = self.collectRects(texfaces, tneighbors)
+            for rect in rects2:
+                rects.append(rect)
+        return rects
+
+
+    def collectRects(self, faceverts, neighbors):
+        #fclusters = dict([(fn,-1) for fn,_ in faceverts])
+        fclusters = {}
+        for fn,_ in faceverts:
+            fclusters[fn] = -1
+            for nn in neighbors[fn]:
+                fclusters[nn] = -1
+        clusters = {-1 : -1}
+        nclusters = 0
+
+        for fn,_ in faceverts:
+            fncl = [self.deref(nn, fclusters, clusters) for nn in neighbors[fn] if nn < fn]
+            if fncl == []:
+                cn = clusters[cn] = nclusters
+                nclusters += 1
+            else:
+                cn = min(fncl)
+                for cn1 in fncl:
+                    clusters[cn1] = cn
+            fclusters[fn] = cn
+
+        for fn,_ in faceverts:
+            fclusters[fn] = self.deref(fn, fclusters, clusters)
+
+        rects = []
+        for cn in clusters.keys():
+            if cn == clusters[cn]:
+                faces = [fn for fn,_ in faceverts if fclusters[fn] == cn]
+                vertsraw = [vs for fn,vs in faceverts if fclusters[fn] == cn]
+                vstruct = {}
+                for vlist in vertsraw:
+                    for vn in vlist:
+                        vstruct[vn] = True
+                verts = list(vstruct.keys())
+                verts.sort()
+                rects.append((verts, faces))
+                if len(rects) > 1000:
+                    print("Too many rects")
+                    return rects, clusters, fclusters
+
+        return rects, clusters, fclusters
+
+
+    def deref(self, fn, fclusters, clusters):
+        cn = fclusters[fn]
+        updates = []
+        while cn != clusters[cn]:
+            updates.append(cn)
+            cn = clusters[cn]
+        for nn in updates:
+            clusters[nn] = cn
+        fclusters[fn] = cn
+        return cn
+
+
+    def findStartingPoint(self, neighbors, uvcenters):
+        types = dict([(n,[]) for n in range(1,5)])
+        for fn,neighs in neighbors.items():
+            nneighs = len(neighs)
+            if nneighs == 0:
+                return None,None,None,None
+            elif nneighs >= 5:
+                sys.stdout.write("N")
+                return None,None,None,None
+            types[nneighs].append(fn)
+
+        singlets = [(uvcenters[fn][0]+uvcenters[fn][1], fn) for fn in types[1]]
+        singlets.sort()
+        if len(singlets) > 0:
+            if len(singlets) != 2:
+                sys.stdout.write("S")
+                return None,None,None,None
+            if (types[3] != [] or types[4] != []):
+                sys.stdout.write("T")
+                return None,None,None,None
+            first = singlets[0][1]
+            corner = types[1]
+            boundary = types[2]
+            bulk = types[3]
+        else:
+            doublets = [(uvcenters[fn][0]+uvcenters[fn][1], fn) for fn in types[2]]
+            doublets.sort()
+            if len(doublets) > 4:
+                sys.stdout.write(">")
+                self.selectFaces([fn for _,fn in doublets])
+                return None,None,None,None
+            if len(doublets) < 4:
+                if len(doublets) == 2:
+                    sys.stdout.write("2")
+                    self.selectFaces(neighbors.keys())
+                return None,None,None,None
+            first = doublets[0][1]
+            corner = types[2]
+            boundary = types[3]
+            bulk = types[4]
+
+        return first, corner, boundary, bulk
+
+
+    def sortColumns(self, first, corner, boundary, bulk, neighbors, uvcenters):
+        column = self.getDown(first, neighbors, corner, boundary, uvcenters)
+        columns = [column]
+        if len(corner) <= 2:
+            return columns
+        fn = first
+        n = 0
+        while (True):
+            n += 1
+            horizontal = [(uvcenters[nb][0], nb) for nb in neighbors[fn]]
+            horizontal.sort()
+            fn = horizontal[-1][1]
+            if n > 50:
+                return columns
+            elif fn in corner:
+                column = self.getDown(fn, neighbors, corner, boundary, uvcenters)
+                columns.append(column)
+                return columns
+            elif fn in boundary:
+                column = self.getDown(fn, neighbors, boundary, bulk, uvcenters)
+                columns.append(column)
+            else:
+                print("Hair bug", fn)
+                return None
+        print("Sorted")
+
+
+    def getDown(self, top, neighbors, boundary, bulk, uvcenters):
+        column = [top]
+        fn = top
+        n = 0
+        while (True):
+            n += 1
+            vertical = [(uvcenters[nb][1], nb) for nb in neighbors[fn]]
+            vertical.sort()
+            fn = vertical[-1][1]
+            if fn in boundary or n > 500:
+                column.append(fn)
+                column.reverse()
+                return column
+            else:
+                column.append(fn)
+
+
+    def getColumnCoords(self, columns, centers):
+        #print("Get column coords")
+        length = len(columns[0])
+        hcoords = []
+        short = False
+        for column in columns:
+            if len(column) < length:
+                length = len(column)
+                short = True
+            hcoord = [centers[fn] for fn in column]
+            hcoords.append(hcoord)
+        if short:
+            hcoords = [hcoord[0:length] for hcoord in hcoords]
+        return hcoords
+
+
+    def quadsOnly(self, faces):
+        for fn in faces:
+            if len(self.faceverts[fn]) != 4:
+                #print("  Face %d has %s corners" % (fn, len(self.faceverts[fn])))
+                self.nonquads.append(fn)
+                return False
+        return True
+
+
+    def selectFaces(self, faces):
+        self.selected += faces
+
+#-------------------------------------------------------------
+#   Extract strands from all parts, possibly in parallel
+#-------------------------------------------------------------
+
+theHairMesh = None
+
+def extractPart(faces):
+    extractor = StrandExtractor(theHairMesh)
+    mnum,rects = extractor.extractStrands(faces)
+    return mnum, rects, extractor.selected, extractor.nonquads
+
+
+def extractAllStrands(hmesh, parts, useParallel):
+    # Workers are forked so they share the mesh arrays without pickling them.
+    # Results are returned in part order, so serial and parallel runs agree.
+    # Forking is unsafe on macOS, so parallel extraction is Linux only.
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    global theHairMesh
+    theHairMesh = hmesh
+    try:
+        if (useParallel and
+            len(parts) > 1 and
+            sys.platform.startswith("linux")):
+            nworkers = os.cpu_count() or 1
+            chunksize = max(1, len(parts)//(4*nworkers))
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=nworkers, mp_context=context) as pool:
+                return list(pool.map(extractPart, parts, chunksize=chunksize))
+        results = []
+        for count,faces in enumerate(parts):
+            results.append(extractPart(faces))
+            if count % 10 == 9:
+                sys.stdout.write(".")
+                sys.stdout.flush()
+        return results
+    finally:
+        theHairMesh = None
+
+#-------------------------------------------------------------
+#   Strands from line and tube hair.
+#   Tube rings are collapsed to their centroids, and strands are
+#   chains of degree-2 nodes between nodes of other degrees.
+#-------------------------------------------------------------
+
+def getRingEdges(coords, faceverts, offsets):
+    # Split face sides into ring edges around the tubes and long edges along them.
+    # Quads keep their shortest pair of opposite sides as ring edges, triangles
+    # their shortest side, and larger polygons are caps where all sides are ring edges.
+    import numpy as np
+    sizes = np.diff(offsets)
+    rings = []
+    longs = []
+
+    quads = offsets[:-1][sizes == 4]
+    if len(quads):
+        v1,v2,v3,v4 = [faceverts[quads+k] for k in range(4)]
+        d12 = np.linalg.norm(coords[v1] - coords[v2], axis=1)
+        d23 = np.linalg.norm(coords[v2] - coords[v3], axis=1)
+        across = (d12 < d23)
+        rings += [np.where(across, v1, v2), np.where(across, v2, v3),
+                  np.where(across, v3, v4), np.where(across, v4, v1)]
+        longs += [np.where(across, v2, v1), np.where(across, v3, v2),
+                  np.where(across, v4, v3), np.where(across, v1, v4)]
+
+    tris = offsets[:-1][sizes == 3]
+    if len(tris):
+        tverts = np.stack([faceverts[tris+k] for k in range(3)], axis=1)
+        nxt = np.roll(tverts, -1, axis=1)
+        dists = np.linalg.norm(coords[tverts] - coords[nxt], axis=2)
+        short = np.argmin(dists, axis=1)
+        rows = np.arange(len(tris))
+        rings += [tverts[rows,short], nxt[rows,short]]
+        for k in (1,2):
+            side = (short+k) % 3
+            longs += [tverts[rows,side], nxt[rows,side]]
+
+    caps = (sizes > 4)
+    if caps.any():
+        first = np.repeat(offsets[:-1][caps], sizes[caps])
+        loops = first + np.arange(len(first)) - np.repeat(np.cumsum(sizes[caps]) - sizes[caps], sizes[caps])
+        last = np.repeat(offsets[1:][caps]-1, sizes[caps])
+        nxt = np.where(loops == last, first, loops+1)
+        rings += [faceverts[loops], faceverts[nxt]]
+
+    def pairs(ends):
+        if ends:
+            return np.stack([np.concatenate(ends[0::2]), np.concatenate(ends[1::2])], axis=1)
+        else:
+            return np.zeros((0,2), dtype=np.int64)
+
+    return pairs(rings), pairs(longs)
+
+
+def collapseTubes(coords, faceverts, offsets, threshold):
+    # Vertices joined by ring edges, or closer than threshold, form one node.
+    # Nodes are numbered after their lowest vertex and placed at the ring centroid.
+    import numpy as np
+    nverts = len(coords)
+    rings,longs = getRingEdges(coords, faceverts, offsets)
+    if threshold > 0 and nverts > 1:
+        cells = np.floor(coords/threshold + 0.5).astype(np.int64)
+        order = np.lexsort(cells.T[::-1])
+        same = (cells[order[1:]] == cells[order[:-1]]).all(axis=1)
+        doubles = np.stack([order[:-1][same], order[1:][same]], axis=1)
+        rings = np.concatenate([rings, doubles])
+    labels = findLooseParts(nverts, rings)
+    roots = np.flatnonzero(labels == np.arange(nverts))
+    nodes = np.searchsorted(roots, labels)
+    counts = np.bincount(nodes, minlength=len(roots))[:,None]
+    centers = np.stack([np.bincount(nodes, weights=coords[:,k], minlength=len(roots)) for k in range(3)], axis=1)
+    return centers/counts, nodes[longs]
+
+
+def findChains(nnodes, edges):
+    # Split the graph at nodes whose degree is not two. Closed loops are opened
+    # at their lowest node, and each chain starts at its lowest end node.
+    import numpy as np
+    from .topology import groupIndices
+    edges = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1,2), axis=1)
+    edges = edges[edges[:,0] != edges[:,1]]
+    if len(edges) == 0:
+        return [], 0
+    keys = np.sort(edges[:,0]*nnodes + edges[:,1])
+    keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+    edges = np.stack([keys//nnodes, keys%nnodes], axis=1)
+    nedges = len(edges)
+    offsets,nodeedges = groupIndices(edges.ravel(), np.repeat(np.arange(nedges), 2), nnodes)
+    degree = np.diff(offsets)
+    offs = offsets.tolist()
+    nodeedges = nodeedges.tolist()
+    ends = edges.sum(axis=1).tolist()
+    twos = (degree == 2).tolist()
+    visited = bytearray(nedges)
+
+    def walk(vn, en):
+        chain = [vn]
+        while not visited[en]:
+            visited[en] = 1
+            vn = ends[en] - vn
+            chain.append(vn)
+            if not twos[vn]:
+                break
+            first = offs[vn]
+            en = nodeedges[first+1] if nodeedges[first] == en else nodeedges[first]
+        if chain[-1] < chain[0]:
+            chain.reverse()
+        return chain
+
+    chains = []
+    starts = np.flatnonzero((degree > 0) & (degree != 2)).tolist()
+    loops = np.flatnonzero(degree == 2).tolist()
+    for vn in starts + loops:
+        for en in nodeedges[offs[vn]:offs[vn+1]]:
+            if not visited[en]:
+                chains.append(walk(vn, en))
+    chains.sort()
+    nbranches = int((degree > 2).sum())
+    return chains, nbranches
@@ -543,7 +543,11 @@ class Baker:
     def getBaseName(self, ob):
         if self.basename:
             return self.basename
-        elif ob.name[-3:] == "_HD":
+        return self.getObjectName(ob)
+
+
+    def getObjectName(self, ob):
+        if ob.name[-3:] == "_HD":
             obname = ob.name[:-3]
         else:
             obname = ob.name
@@ -559,9 +563,13 @@ class Baker:
             return ("%s_DISP_%d_%s.png" % (basename, tile, self.imageSize))
 
 
+    def getBakeFolder(self):
+        return self.bakeType.lower()
+
+
     def getImagePath(self, imgname, create):
         folder = os.path.dirname(bpy.data.filepath)
-        dirpath = os.path.join(folder, "textures", self.bakeType.lower(), self.subfolder)
+        dirpath = os.path.join(folder, "textures", self.getBakeFolder(), self.subfolder)
         if not os.path.exists(dirpath):
             if create:
                 os.makedirs(dirpath)
@@ -765,6 +773,281 @@ class DAZ_OT_BakeMaps(DazPropsOperator, Baker):
                 uvloop.data[n].uv[0] += dx
                 uvloop.data[n].uv[1] += dy
 
+#----------------------------------------------------------
+#   Bake texture atlas
+#----------------------------------------------------------
+
+class DAZ_OT_BakeAtlas(DazPropsOperator, Baker, IsMesh):
+    bl_idname = "daz.bake_atlas"
+    bl_label = "Bake Texture Atlas"
+    bl_description = (
+        "Bake all materials of the selected meshes into a single texture atlas\n" +
+        "and replace the materials with one simple material")
+    bl_options = {'UNDO'}
+
+    useBaseColor : BoolProperty(
+        name = "Base Color",
+        description = "Bake base color atlas",
+        default = True)
+
+    useNormal : BoolProperty(
+        name = "Normal",
+        description = "Bake tangent space normal atlas",
+        default = True)
+
+    useRoughness : BoolProperty(
+        name = "Roughness",
+        description = "Bake roughness atlas",
+        default = True)
+
+    samples : IntProperty(
+        name = "Samples",
+        description = "Number of Cycles samples used for baking",
+        min = 1, max = 1024,
+        default = 16)
+
+    margin : IntProperty(
+        name = "Margin",
+        description = "Margin between atlas cells in pixels",
+        min = 0, max = 64,
+        default = 4)
+
+    Channels = [
+        ("useBaseColor", "BaseColor", 'DIFFUSE', "sRGB"),
+        ("useNormal", "Normal", 'NORMAL', "Non-Color"),
+        ("useRoughness", "Roughness", 'ROUGHNESS', "Non-Color"),
+    ]
+
+    def draw(self, context):
+        self.layout.prop(self, "imageSize")
+        self.layout.prop(self, "subfolder")
+        self.layout.prop(self, "basename")
+        self.layout.prop(self, "useBaseColor")
+        self.layout.prop(self, "useNormal")
+        self.layout.prop(self, "useRoughness")
+        self.layout.prop(self, "samples")
+        self.layout.prop(self, "margin")
+
+    @classmethod
+    def poll(self, context):
+        ob = context.object
+        return (bpy.data.filepath and ob and ob.type == 'MESH')
+
+
+    def storeState(self, context):
+        DazPropsOperator.storeState(self, context)
+        scn = context.scene
+        self.engine = scn.render.engine
+        self.device = scn.cycles.device
+        self.samples0 = scn.cycles.samples
+        self.margin0 = scn.render.bake.margin
+        self.object = context.view_layer.objects.active
+        scn.render.engine = 'CYCLES'
+        scn.cycles.device = 'CPU'
+        scn.cycles.samples = self.samples
+        scn.render.bake.margin = self.margin
+
+
+    def restoreState(self, context):
+        scn = context.scene
+        scn.render.engine = self.engine
+        scn.cycles.device = self.device
+        scn.cycles.samples = self.samples0
+        scn.render.bake.margin = self.margin0
+        context.view_layer.objects.active = self.object
+        DazPropsOperator.restoreState(self, context)
+
+
+    def invoke(self, context, event):
+        self.setDefaultNames(context)
+        return DazPropsOperator.invoke(self, context, event)
+
+
+    def getBakeFolder(self):
+        return "atlas"
+
+
+    def run(self, context):
+        self.storeDefaultNames(context)
+        objects = [ob for ob in getSelectedMeshes(context) if ob.data.materials]
+        self.setAtlasNames(objects)
+        for ob in objects:
+            activateObject(context, ob)
+            self.bakeAtlas(context, ob)
+
+
+    def bakeAtlas(self, context, ob):
+        print("Bake atlas for %s" % ob.name)
+        setMode('OBJECT')
+        if ob.data.uv_layers.active is None:
+            print("Object %s has no UV layer" % ob.name)
+            return
+        uvname = "Atlas"
+        packMaterialUVs(ob, uvname, int(self.imageSize), self.margin)
+        mats = []
+        for mat in ob.data.materials:
+            if mat and mat not in mats:
+                mats.append(mat)
+                if not mat.use_nodes:
+                    mat.use_nodes = True
+        images = {}
+        channels = [data for data in self.Channels if getattr(self, data[0])]
+        startProgress("Baking atlas for %s" % ob.name)
+        for n,data in enumerate(channels):
+            _,cname,bakeType,colorSpace = data
+            showProgress(n, len(channels))
+            img = images[cname] = self.makeAtlasImage(ob, cname, colorSpace)
+            texnodes = [self.addBakeNode(mat, img) for mat in mats]
+            try:
+                if bakeType == 'DIFFUSE':
+                    bpy.ops.object.bake(type=bakeType, pass_filter={'COLOR'}, uv_layer=uvname)
+                elif bakeType == 'NORMAL':
+                    bpy.ops.object.bake(type=bakeType, normal_space='TANGENT', uv_layer=uvname)
+                else:
+                    bpy.ops.object.bake(type=bakeType, uv_layer=uvname)
+            finally:
+                for mat,node in zip(mats, texnodes):
+                    mat.node_tree.nodes.remove(node)
+            img.save()
+            print("Saved %s" % img.filepath)
+        showProgress(len(channels), len(channels))
+        endProgress()
+
+        amat = self.makeAtlasMaterial(ob, images, uvname)
+        self.replaceMaterials(ob, amat)
+        uvlayer = ob.data.uv_layers[uvname]
+        ob.data.uv_layers.active = uvlayer
+        uvlayer.active_render = True
+
+
+    def setAtlasNames(self, objects):
+        # The base name belongs to the active object, other meshes use their own names
+        self.atlasNames = {}
+        for ob in objects:
+            if ob == self.object:
+                basename = name = self.getBaseName(ob)
+            else:
+                basename = name = self.getObjectName(ob)
+            n = 1
+            while name in self.atlasNames.values():
+                name = "%s_%d" % (basename, n)
+                n += 1
+            self.atlasNames[ob.name] = name
+
+
+    def makeAtlasImage(self, ob, cname, colorSpace):
+        basename = self.atlasNames[ob.name]
+        imgname = ("%s_%s_%s.png" % (basename, cname, self.imageSize))
+        size = int(self.imageSize)
+        img = bpy.data.images.new(imgname, size, size)
+        img.colorspace_settings.name = colorSpace
+        img.filepath = self.getImagePath(imgname, True)
+        return img
+
+
+    def addBakeNode(self, mat, img):
+        tree = mat.node_tree
+        node = tree.nodes.new(type = "ShaderNodeTexImage")
+        node.image = img
+        node.select = True
+        tree.nodes.active = node
+        return node
+
+
+    def makeAtlasMaterial(self, ob, images, uvname):
+        mat = bpy.data.materials.new("%s_Atlas" % self.atlasNames[ob.name])
+        mat.use_nodes = True
+        tree = mat.node_tree
+        tree.nodes.clear()
+        uvmap = tree.nodes.new(type = "ShaderNodeUVMap")
+        uvmap.uv_map = uvname
+        uvmap.location = (-600, 0)
+        bsdf = tree.nodes.new(type = "ShaderNodeBsdfPrincipled")
+        bsdf.location = (0, 0)
+        output = tree.nodes.new(type = "ShaderNodeOutputMaterial")
+        output.location = (300, 0)
+        tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
+        for n,data in enumerate(self.Channels):
+            _,cname,_,_ = data
+            if cname not in images.keys():
+                continue
+            tex = tree.nodes.new(type = "ShaderNodeTexImage")
+            tex.image = images[cname]
+            tex.interpolation = GS.imageInterpolation
+            tex.location = (-400, 300 - 300*n)
+            tree.links.new(uvmap.outputs["UV"], tex.inputs["Vector"])
+            if cname == "BaseColor":
+                tree.links.new(tex.outputs["Color"], bsdf.inputs["Base Color"])
+            elif cname == "Roughness":
+                tree.links.new(tex.outputs["Color"], bsdf.inputs["Roughness"])
+            elif cname == "Normal":
+                normal = tree.nodes.new(type = "ShaderNodeNormalMap")
+                normal.space = 'TANGENT'
+                normal.uv_map = uvname
+                normal.location = (-200, 300 - 300*n)
+                tree.links.new(tex.outputs["Color"], normal.inputs["Color"])
+                tree.links.new(normal.outputs["Normal"], bsdf.inputs["Normal"])
+        return mat
+
+
+    def replaceMaterials(self, ob, amat):
+        import numpy as np
+        ob.data.materials.clear()
+        ob.data.materials.append(amat)
+        mnums = np.zeros(len(ob.data.polygons), dtype=np.int32)
+        ob.data.polygons.foreach_set("material_index", mnums)
+        ob.data.update()
+
+
+def getLoopMaterials(me):
+    import numpy as np
+    nfaces = len(me.polygons)
+    nloops = len(me.loops)
+    mnums = np.empty(nfaces, dtype=np.int32)
+    me.polygons.foreach_get("material_index", mnums)
+    starts = np.empty(nfaces, dtype=np.int32)
+    me.polygons.foreach_get("loop_start", starts)
+    totals = np.empty(nfaces, dtype=np.int32)
+    me.polygons.foreach_get("loop_total", totals)
+    firsts = np.cumsum(totals) - totals
+    lidxs = np.repeat(starts - firsts, totals) + np.arange(nloops)
+    lmnums = np.empty(nloops, dtype=np.int32)
+    lmnums[lidxs] = np.repeat(mnums, totals)
+    return lmnums
+
+
+def packMaterialUVs(ob, uvname, size, margin):
+    #   Give each material its own square cell in the atlas and scale the
+    #   bounding box of its UVs uniformly into the cell.
+    import numpy as np
+    me = ob.data
+    nloops = len(me.loops)
+    uvs = np.empty((nloops, 2), dtype=np.float32)
+    me.uv_layers.active.data.foreach_get("uv", uvs.ravel())
+    lmnums = getLoopMaterials(me)
+    used = np.unique(lmnums)
+    ncells = int(np.ceil(np.sqrt(len(used))))
+    cell = 1.0/ncells
+    pad = min(margin/size, 0.25*cell)
+    atlas = np.empty((nloops, 2), dtype=np.float32)
+    for k,mn in enumerate(used):
+        mask = (lmnums == mn)
+        muvs = uvs[mask]
+        uvmin = muvs.min(axis=0)
+        extent = max(muvs.max(axis=0) - uvmin)
+        if extent <= 0:
+            extent = 1.0
+        scale = (cell - 2*pad)/extent
+        origin = np.array((k % ncells, k // ncells), dtype=np.float32)*cell + pad
+        atlas[mask] = origin + (muvs - uvmin)*scale
+
+    uvlayer = me.uv_layers.get(uvname)
+    if uvlayer is None:
+        uvlayer = me.uv_layers.new(name=uvname, do_init=False)
+        if uvlayer is None:
+            raise DazError("Cannot create UV layer %s for %s" % (uvname, ob.name))
+    uvlayer.data.foreach_set("uv", atlas.ravel())
+
 #----------------------------------------------------------
 #   Load normal/displacement maps
 #----------------------------------------------------------
@@ -888,6 +1171,7 @@ classes = [
     DAZ_OT_LoadVectorDisp,
     DAZ_OT_LoadNormalMap,
     DAZ_OT_BakeMaps,
+    DAZ_OT_BakeAtlas,
     DAZ_OT_LoadBakedMaps,
 ]
 
@@ -28,6 +28,7 @@
 
 import json
 import gzip
+import re
 from mathutils import Vector, Color
 from .error import reportError
 
@@ -143,3 +144,188 @@ def leafList(data):
         if isinstance(elt, (list,dict)):
             return False
     return True
+
+#-------------------------------------------------------------
+#   Incremental json reader
+#-------------------------------------------------------------
+
+def openJsonFile(filepath):
+    with open(filepath, "rb") as fp:
+        magic = fp.read(2)
+    if magic == b'\x1f\x8b':
+        return gzip.open(filepath, "rt", encoding="utf_8_sig")
+    else:
+        return open(filepath, "r", encoding="utf_8_sig")
+
+
+def readJsonText(filepath):
+    with openJsonFile(filepath) as fp:
+        return fp.read()
+
+
+class JsonStream:
+    ChunkSize = 1 << 20
+    Whitespace = re.compile(r'[ \t\n\r]*')
+    Tokens = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|"|[\[\]{}]')
+    Delimiter = re.compile(r'[ \t\n\r,:\]}]')
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+
+    def error(self, msg):
+        return json.decoder.JSONDecodeError(msg, self.buffer, self.pos)
+
+
+    def fill(self):
+        if self.eof:
+            return False
+        data = self.fp.read(self.ChunkSize)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+
+    def peek(self):
+        while True:
+            self.pos = self.Whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise self.error("Unexpected end of file")
+
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error("Expected '%s'" % char)
+        self.pos += 1
+
+
+    def readValue(self):
+        if self.peek() not in '"[{':
+            # Numbers and literals may continue in the next chunk
+            while (not self.Delimiter.search(self.buffer, self.pos) and
+                   self.fill()):
+                pass
+        while True:
+            try:
+                value,end = self.decoder.raw_decode(self.buffer, self.pos)
+                self.pos = end
+                return value
+            except json.decoder.JSONDecodeError:
+                if not self.fill():
+                    raise
+
+
+    def skipValue(self):
+        if self.peek() not in "[{":
+            self.readValue()
+            return
+        depth = 0
+        while True:
+            match = self.Tokens.search(self.buffer, self.pos)
+            if match is None:
+                self.pos = len(self.buffer)
+            elif match.group() == '"':
+                self.pos = match.start()
+            else:
+                self.pos = match.end()
+                token = match.group()
+                if token[0] == '"':
+                    continue
+                elif token in "[{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return
+                continue
+            if not self.fill():
+                raise self.error("Unexpected end of file")
+
+
+    def iterObject(self):
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.readValue()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            elif char != ",":
+                raise self.error("Expected ',' or '}'")
+
+
+    def iterArray(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            elif char != ",":
+                raise self.error("Expected ',' or ']'")
+
+
+class AnimationStream:
+    def __init__(self, filepath, text=None):
+        self.filepath = filepath
+        self.text = text
+        self.hasScene = False
+        self.hasAnimations = False
+        self.extra = []
+
+
+    def __iter__(self):
+        try:
+            if self.text is None:
+                fp = openJsonFile(self.filepath)
+            else:
+                import io
+                fp = io.StringIO(self.text)
+                self.text = None
+        except OSError:
+            reportError("Could not load %s" % self.filepath)
+            return
+        try:
+            stream = JsonStream(fp)
+            for key in stream.iterObject():
+                if key != "scene":
+                    stream.skipValue()
+                    continue
+                self.hasScene = True
+                for skey in stream.iterObject():
+                    if skey == "animations":
+                        self.hasAnimations = True
+                        for _ in stream.iterArray():
+                            anim = stream.readValue()
+                            if "url" in anim.keys():
+                                yield anim["url"], [key[0:2] for key in anim["keys"]]
+                    elif skey == "extra":
+                        self.extra = stream.readValue()
+                    else:
+                        stream.skipValue()
+        except json.decoder.JSONDecodeError as err:
+            msg = ('JSON error while reading file\n"%s"\n%s' % (self.filepath, err))
+            reportError(msg, trigger=(1,2))
+        except UnicodeDecodeError as err:
+            msg = ('Unicode error while reading file\n"%s"\n%s' % (self.filepath, err))
+            reportError(msg, trigger=(1,2))
+        finally:
+            fp.close()
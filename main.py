@@ -186,6 +186,8 @@ class ImportDAZ(DazOperator, DazOptions, MultiFile):
         if main is None:
             msg = ("File not found:  \n%s      " % filepath)
             raise DazError(msg)
+        from .material import prefetchImages
+        prefetchImages(main.materials)
         showProgress(20, 100)
 
         print("Preprocessing...")
@@ -204,6 +206,7 @@ class ImportDAZ(DazOperator, DazOptions, MultiFile):
         print("Building objects...")
         for asset in main.materials:
             asset.build(context)
+        LS.stopImagePrefetch()
         showProgress(50, 100)
 
         nnodes = len(main.nodes)
@@ -329,26 +329,96 @@ def getTweakableChannel(cname):
         return (nodeType, slot, None, None, ncomps, None)
 
 
+# ---------------------------------------------------------------------
+#   Channel index
+#
+#   Maps tweakable channel keys to the nodes and sockets that implement
+#   them, so each node tree is only searched once while editing.
+# ---------------------------------------------------------------------
+
+theChannelIndices = {}
+
+class ChannelIndex:
+    def __init__(self, tree):
+        self.signature = getTreeSignature(tree)
+        self.nodes = {}
+        self.links = {}
+        self.fromTypes = {}
+        self.channels = {}
+        for node in tree.nodes.values():
+            if node.type == 'GROUP':
+                if node.node_tree is None:
+                    continue
+                key = node.node_tree.name
+            else:
+                key = node.type
+            if key not in self.nodes.keys():
+                self.nodes[key] = []
+            self.nodes[key].append(node)
+        for link in tree.links.values():
+            tonode = link.to_node
+            self.links[tonode.name, link.to_socket.identifier] = (link.from_node, link.from_socket)
+            if tonode.name not in self.fromTypes.keys():
+                self.fromTypes[tonode.name] = {}
+            self.fromTypes[tonode.name][link.from_node.type] = True
+
+
+    def getSockets(self, key):
+        if key not in self.channels.keys():
+            nodeType, slot, useAttr, factorAttr, ncomps, fromType = getTweakableChannel(key)
+            sockets = []
+            if nodeType in self.nodes.keys():
+                for node in self.nodes[nodeType]:
+                    if fromType and fromType not in self.fromTypes.get(node.name, {}).keys():
+                        continue
+                    elif slot not in node.inputs.keys():
+                        continue
+                    socket = node.inputs[slot]
+                    fromnode,fromsocket = self.links.get((node.name, socket.identifier), (None,None))
+                    sockets.append((node, socket, fromnode, fromsocket))
+            self.channels[key] = sockets
+        return self.channels[key]
+
+
+def getTreeSignature(tree):
+    return (tree.as_pointer(), len(tree.nodes), len(tree.links))
+
+
+def getChannelIndex(mat):
+    tree = mat.node_tree
+    index = theChannelIndices.get(mat.name)
+    if index is None or index.signature != getTreeSignature(tree):
+        index = theChannelIndices[mat.name] = ChannelIndex(tree)
+    return index
+
+
+def clearChannelIndices():
+    theChannelIndices.clear()
+
+
 class ChannelSetter:
     def setChannelCycles(self, mat, item):
+        if mat.node_tree is None:
+            return
         nodeType, slot, useAttr, factorAttr, ncomps, fromType = getTweakableChannel(item.name)
-
-        for node in mat.node_tree.nodes.values():
-            if self.matchingNode(node, nodeType, mat, fromType):
-                socket = node.inputs[slot]
-                self.setOriginal(socket, ncomps, mat, item.name)
-                self.setSocket(socket, ncomps, item)
-                fromnode,fromsocket = self.getFromNode(mat, node, socket)
-                if fromnode:
-                    if fromnode.type in "MIX_RGB":
-                        self.ensureColor(ncomps, item)
-                        self.setSocket(fromnode.inputs[1], 4, item)
-                    elif fromnode.type == "MATH" and fromnode.operation == 'MULTIPLY':
-                        self.setSocket(fromnode.inputs[0], 1, item)
-                    elif fromnode.type == "MATH" and fromnode.operation == 'MULTIPLY_ADD':
-                        self.setSocket(fromnode.inputs[1], 1, item)
-                    elif fromnode.type in ["TEX_IMAGE", "GAMMA"]:
-                        self.multiplyTex(node, fromsocket, socket, mat.node_tree, item)
+        index = getChannelIndex(mat)
+        changed = False
+        for node,socket,fromnode,fromsocket in index.getSockets(item.name):
+            self.setOriginal(socket, ncomps, mat, item.name)
+            self.setSocket(socket, ncomps, item)
+            if fromnode:
+                if fromnode.type in "MIX_RGB":
+                    self.ensureColor(ncomps, item)
+                    self.setSocket(fromnode.inputs[1], 4, item)
+                elif fromnode.type == "MATH" and fromnode.operation == 'MULTIPLY':
+                    self.setSocket(fromnode.inputs[0], 1, item)
+                elif fromnode.type == "MATH" and fromnode.operation == 'MULTIPLY_ADD':
+                    self.setSocket(fromnode.inputs[1], 1, item)
+                elif fromnode.type in ["TEX_IMAGE", "GAMMA"]:
+                    if self.multiplyTex(node, fromsocket, socket, mat.node_tree, item):
+                        changed = True
+        if changed:
+            theChannelIndices.pop(mat.name, None)
 
 
     def ensureColor(self, ncomps, item):
@@ -390,29 +460,26 @@ class ChannelSetter:
     def getChannel(self, ob, key):
         nodeType, slot, useAttr, factorAttr, ncomps, fromType = getTweakableChannel(key)
         mat = ob.active_material
-        if mat.use_nodes:
-            return self.getChannelCycles(mat, nodeType, slot, ncomps, fromType)
+        if mat.use_nodes and mat.node_tree:
+            return self.getChannelCycles(mat, key, ncomps)
         else:
             return None,0
 
 
-    def getChannelCycles(self, mat, nodeType, slot, ncomps, fromType):
-        for node in mat.node_tree.nodes.values():
-            if (self.matchingNode(node, nodeType, mat, fromType) and
-                slot in node.inputs.keys()):
-                socket = node.inputs[slot]
-                fromnode,fromsocket = self.getFromNode(mat, node, socket)
-                if fromnode:
-                    if fromnode.type == "MIX_RGB":
-                        return fromnode.inputs[1].default_value, ncomps
-                    elif fromnode.type == "MATH" and fromnode.operation == 'MULTIPLY':
-                        return fromnode.inputs[0].default_value, ncomps
-                    elif fromnode.type == "GAMMA":
-                        return fromnode.inputs[0].default_value, ncomps
-                    elif fromnode.type == "TEX_IMAGE":
-                        return WHITE, ncomps
-                else:
-                    return socket.default_value, ncomps
+    def getChannelCycles(self, mat, key, ncomps):
+        index = getChannelIndex(mat)
+        for node,socket,fromnode,fromsocket in index.getSockets(key):
+            if fromnode:
+                if fromnode.type == "MIX_RGB":
+                    return fromnode.inputs[1].default_value, ncomps
+                elif fromnode.type == "MATH" and fromnode.operation == 'MULTIPLY':
+                    return fromnode.inputs[0].default_value, ncomps
+                elif fromnode.type == "GAMMA":
+                    return fromnode.inputs[0].default_value, ncomps
+                elif fromnode.type == "TEX_IMAGE":
+                    return WHITE, ncomps
+            else:
+                return socket.default_value, ncomps
         return None,0
 
 
@@ -444,27 +511,6 @@ class ChannelSetter:
                 return True
         return False
 
-
-    def getFromNode(self, mat, node, socket):
-        for link in mat.node_tree.links.values():
-            if link.to_node == node and link.to_socket == socket:
-                return (link.from_node, link.from_socket)
-        return None,None
-
-
-    def matchingNode(self, node, nodeType, mat, fromType):
-        if node.type == nodeType:
-            if fromType is None:
-                return True
-            for link in mat.node_tree.links.values():
-                if link.to_node == node and link.from_node.type == fromType:
-                    return True
-            return False
-        elif (node.type == "GROUP" and
-            nodeType in bpy.data.node_groups.keys()):
-            return (node.node_tree == bpy.data.node_groups[nodeType])
-        return False
-
 # ---------------------------------------------------------------------
 #   Launch button
 # ---------------------------------------------------------------------
@@ -513,6 +559,7 @@ class DAZ_OT_LaunchEditor(DazPropsOperator, MaterialSelector, ChannelSetter, Lau
     def invoke(self, context, event):
         global theMaterialEditor
         theMaterialEditor = self
+        clearChannelIndices()
         ob = context.object
         self.setupMaterials(ob)
         self.shows.clear()
@@ -698,8 +745,10 @@ class DAZ_OT_ResetMaterial(DazOperator, ChannelSetter, IsMesh):
     bl_options = {'UNDO'}
 
     def run(self, context):
+        clearChannelIndices()
         for ob in getSelectedMeshes(context):
             self.resetObject(ob)
+        clearChannelIndices()
 
 
     def resetObject(self, ob):
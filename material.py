@@ -563,6 +563,29 @@ class Material(Asset, Channels):
         return texs,nmaps
 
 
+    def getImageUrls(self):
+        urls = []
+        if self.ignore:
+            return urls
+        for key in self.channels:
+            channel = self.getChannel([key])
+            if channel is None:
+                continue
+            elif channel.get("image"):
+                asset = self.getAsset(channel["image"], strict=False)
+                if isinstance(asset, Images):
+                    urls += [map.url for map in asset.maps if map.url]
+            elif channel.get("image_file"):
+                urls.append(channel["image_file"])
+            elif "literal_maps" in channel.keys():
+                for struct in channel["literal_maps"]["map"]:
+                    if "mask" in struct.keys() and struct["mask"].get("url"):
+                        urls.append(struct["mask"]["url"])
+                    if struct.get("url"):
+                        urls.append(struct["url"])
+        return urls
+
+
     def hasTextures(self, channel):
         return (self.getTextures(channel)[0] != [])
 
@@ -677,7 +700,11 @@ def getImage(url):
 
 def loadImage(url):
     from .asset import getDazPath
-    filepath = getDazPath(url)
+    filepath = None
+    if LS.imagePrefetcher:
+        filepath = LS.imagePrefetcher.getPath(url)
+    if filepath is None:
+        filepath = getDazPath(url)
     if filepath is None:
         reportError('Image not found:  \n"%s"' % filepath, trigger=(3,4))
         img = None
@@ -688,6 +715,75 @@ def loadImage(url):
     return img
 
 
+#-------------------------------------------------------------
+#   Image prefetching
+#-------------------------------------------------------------
+
+#   Image files are resolved and read in a background thread pool while
+#   the rest of the file is preprocessed, so that loadImage finds them in
+#   the OS cache. Blender images must be created in the main thread.
+
+class ImagePrefetcher:
+    MaxWorkers = 8
+    BlockSize = 1 << 20
+
+    def __init__(self, urls):
+        from concurrent.futures import ThreadPoolExecutor
+        self.futures = {}
+        self.executor = None
+        if not urls:
+            return
+        nworkers = min(self.MaxWorkers, len(urls))
+        self.executor = ThreadPoolExecutor(max_workers=nworkers)
+        for url in urls:
+            self.futures[url] = self.executor.submit(self.prefetch, url)
+
+
+    def prefetch(self, url):
+        from .asset import getDazPath
+        filepath = getDazPath(url, strict=False)
+        if filepath is None:
+            return None
+        try:
+            with open(filepath, "rb") as fp:
+                while fp.read(self.BlockSize):
+                    pass
+        except OSError:
+            pass
+        return filepath
+
+
+    def getPath(self, url):
+        future = self.futures.get(url)
+        if future is None or future.cancelled():
+            return None
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+
+    def shutdown(self):
+        for future in self.futures.values():
+            future.cancel()
+        if self.executor:
+            self.executor.shutdown(wait=False)
+        self.futures = {}
+        self.executor = None
+
+
+def prefetchImages(materials):
+    LS.stopImagePrefetch()
+    urls = {}
+    for mat in materials:
+        for url in mat.getImageUrls():
+            if url not in LS.images.keys():
+                urls[url] = True
+    if urls:
+        print("Prefetching %d images" % len(urls))
+        LS.imagePrefetcher = ImagePrefetcher(list(urls.keys()))
+
+
 class Images(Asset):
     def __init__(self, fileref):
         Asset.__init__(self, fileref)
@@ -195,6 +195,9 @@ class DAZ_PT_AdvancedLowpoly(DAZ_PT_Base, bpy.types.Panel):
         self.layout.operator("daz.quadify")
         self.layout.separator()
         self.layout.operator("daz.add_push")
+        if bpy.app.version >= (2,82,0):
+            self.layout.separator()
+            self.layout.operator("daz.bake_atlas")
 
 
 class DAZ_PT_AdvancedVisibility(DAZ_PT_Base, bpy.types.Panel):
@@ -458,6 +461,7 @@ class DAZ_PT_Posing(DAZ_PT_Base, bpy.types.Panel):
         else:
             layout.operator("daz.disable_drivers")
         layout.operator("daz.prune_action")
+        layout.operator("daz.reduce_keys")
         layout.separator()
         layout.operator("daz.impose_locks_limits")
         layout.operator("daz.bake_pose_to_fk_rig")
@@ -195,68 +195,50 @@ class Proxifier(DriverUser):
         self.colorOnly = False
 
 
-    def remains(self):
-        free = [t for t in self.dirty.values() if not t]
-        return len(free)
-
-
     def setup(self, ob, context):
+        import numpy as np
         self.faceverts, self.vertfaces, self.neighbors, self.seams = findSeams(ob)
         if self.colorOnly:
             self.createMaterials()
-        self.origMnums = {}
-        for f in ob.data.polygons:
-            self.origMnums[f.index] = f.material_index
-            if self.colorOnly:
-                f.material_index = 0
+        mnums = np.zeros(self.nfaces, dtype=np.int32)
+        ob.data.polygons.foreach_get("material_index", mnums)
+        self.origMnums = mnums.tolist()
+        if self.colorOnly:
+            ob.data.polygons.foreach_set("material_index", np.zeros(self.nfaces, dtype=np.int32))
 
         deselectEverything(ob, context)
-        self.dirty = dict([(fn,False) for fn in range(self.nfaces)])
-        for f in ob.data.polygons:
-            if f.hide:
-                self.dirty[f.index] = True
-        newfaces = [[fn] for fn in range(self.nfaces) if self.dirty[fn]]
+        hidden = np.zeros(self.nfaces, dtype=bool)
+        ob.data.polygons.foreach_get("hide", hidden)
+        self.dirty = dict(enumerate(hidden.tolist()))
+        newfaces = [[fn] for fn in np.flatnonzero(hidden).tolist()]
         printStatistics(ob)
         return newfaces
 
 
     def getConnectedComponents(self):
-        self.clusters = dict([(fn,-1) for fn in range(self.nfaces)])
-        self.refs = dict([(fn,fn) for fn in range(self.nfaces)])
-        cnum = 0
-        for fn in range(self.nfaces):
-            cnums = []
-            for fn2 in self.neighbors[fn]:
-                cn = self.clusters[fn2]
-                if cn >= 0:
-                    cnums.append(self.deref(cn))
-            cnums.sort()
-            if cnums:
-                self.clusters[fn] = cn0 = cnums[0]
-                for cn in cnums[1:]:
-                    self.refs[cn] = cn0
-            else:
-                self.clusters[fn] = cn0 = cnum
-                cnum += 1
-
-        comps = dict([(cn,[]) for cn in range(cnum)])
-        taken = dict([(cn,False) for cn in range(cnum)])
-        for fn in range(self.nfaces):
-            cn = self.clusters[fn]
-            cn = self.deref(cn)
-            comps[cn].append(fn)
-            self.clusters[fn] = cn
+        # Each component is labelled with its lowest face
+        import numpy as np
+        from .topology import groupIndices
+        nfaces = self.nfaces
+        counts = [len(self.neighbors[fn]) for fn in range(nfaces)]
+        fnums = [fn2 for fn in range(nfaces) for fn2 in self.neighbors[fn]]
+        pairs = np.stack([np.repeat(np.arange(nfaces), counts), np.array(fnums, dtype=int)], axis=1)
+        clusters = findLooseParts(nfaces, pairs)
+        offsets,faces = groupIndices(clusters, np.arange(nfaces), nfaces)
+        offsets = offsets.tolist()
+        faces = faces.tolist()
+        roots = np.flatnonzero(clusters == np.arange(nfaces)).tolist()
+        self.clusters = clusters.tolist()
+        comps = dict([(cn, faces[offsets[cn]:offsets[cn+1]]) for cn in roots])
+        taken = dict([(cn,False) for cn in roots])
         return comps,taken
 
 
-    def deref(self, cn):
-        cnums = []
-        while self.refs[cn] != cn:
-            cnums.append(cn)
-            cn = self.refs[cn]
-        for cn1 in cnums:
-            self.refs[cn1] = cn
-        return cn
+    def getLabelFaces(self):
+        # Faces that opened a new component number when faces were labelled
+        # one at a time in order. Numbers of merged components stay unused.
+        return [fn for fn in range(self.nfaces)
+                if all(fn2 > fn for fn2 in self.neighbors[fn])]
 
 
     def getComponents(self, ob, context):
@@ -291,9 +273,12 @@ class Proxifier(DriverUser):
 
 
     def make(self, ob, context):
+        # Every taken face belongs to exactly one new face, so the number of
+        # remaining faces is tracked without rescanning. Each step only grows
+        # the new faces made in the previous step.
         newfaces = self.setup(ob, context)
-        remains1 = self.remains()
-        print("Step 0 Remains:", remains1)
+        ntaken = len(newfaces)
+        print("Step 0 Remains:", self.nfaces - ntaken)
 
         nodes = self.getNodes()
         for fn in nodes:
@@ -302,19 +287,18 @@ class Proxifier(DriverUser):
             self.mergeFaces(fn, newfaces)
 
         prevblock = newfaces
+        ntaken = sum([len(newface) for newface in newfaces])
         step = 1
-        remains2 = self.remains()
-        while remains2 and remains2 < remains1 and step < 50:
-            print("Step %d Remains:" % step, self.remains())
+        while prevblock and ntaken < self.nfaces and step < 50:
+            print("Step %d Remains:" % step, self.nfaces - ntaken)
             block = []
             for newface in prevblock:
                 self.mergeNextFaces(newface, block)
             newfaces += block
+            ntaken += sum([len(newface) for newface in block])
             prevblock = block
             step += 1
-            remains1 = remains2
-            remains2 = self.remains()
-        print("Step %d Remains:" % step, self.remains())
+        print("Step %d Remains:" % step, self.nfaces - ntaken)
 
         if self.colorOnly:
             self.combineFaces(newfaces)
@@ -355,11 +339,20 @@ class Proxifier(DriverUser):
     def buildNewMesh(self, newfaces):
         from .geometry import makeNewUvloop
 
+        import numpy as np
         free = [[fn] for fn,t in self.dirty.items() if not t]
         newfaces += free
         ob = self.object
-        uvtex,uvloop,uvdata = getUvData(ob)
-        self.vertmap = dict([(vn,-1) for vn in range(self.nverts)])
+        coords = np.zeros(3*self.nverts, dtype=np.float32)
+        ob.data.vertices.foreach_get("co", coords)
+        coords = coords.reshape(-1,3)
+        uvs = np.zeros(2*len(ob.data.loops), dtype=np.float32)
+        ob.data.uv_layers[0].data.foreach_get("uv", uvs)
+        uvs = uvs.reshape(-1,2)
+        loopstarts = np.zeros(self.nfaces, dtype=np.int32)
+        ob.data.polygons.foreach_get("loop_start", loopstarts)
+        loopstarts = loopstarts.tolist()
+        self.vertmap = [-1] * self.nverts
         self.verts = []
         self.lastvert = 0
         faces = []
@@ -387,7 +380,7 @@ class Proxifier(DriverUser):
                     idx = 0
                 vn = fverts[idx]
             face = [self.getVert(vn)]
-            uvface = [uvdata[fn1][idx]]
+            uvface = [loopstarts[fn1] + idx]
             mnums.append(self.origMnums[fn1])
             taken[vn] = True
             done = False
@@ -403,7 +396,7 @@ class Proxifier(DriverUser):
                     done = True
                 else:
                     face.append(self.getVert(vn))
-                    uvface.append(uvdata[fn1][idx])
+                    uvface.append(loopstarts[fn1] + idx)
                     taken[vn] = True
             if len(face) >= 3:
                 faces.append(face)
@@ -411,33 +404,34 @@ class Proxifier(DriverUser):
             else:
                 print("Non-face:", face)
 
+        # Write the new mesh in bulk
         me = bpy.data.meshes.new("New")
-        me.from_pydata(self.verts, [], faces)
+        me.from_pydata(coords[self.verts].tolist(), [], faces)
         uvloop = makeNewUvloop(me, "Uvloop", True)
-        n = 0
-        for uvface in uvfaces:
-            for uv in uvface:
-                uvloop.data[n].uv = uv
-                n += 1
+        loops = [m for uvface in uvfaces for m in uvface]
+        uvloop.data.foreach_set("uv", uvs[loops].ravel())
         for mat in mats:
             me.materials.append(mat)
-        for fn,mn in enumerate(mnums):
-            f = me.polygons[fn]
-            f.material_index = mn
-            f.use_smooth = True
+        me.polygons.foreach_set("material_index", mnums)
+        me.polygons.foreach_set("use_smooth", [True]*len(mnums))
 
+        # Vertex group weights are added in batches of equal weight
         vgnames = [vgrp.name for vgrp in ob.vertex_groups]
-        weights = dict([(vn,{}) for vn in range(self.nverts)])
-        for vn,v in enumerate(ob.data.vertices):
-            nvn = self.vertmap[vn]
-            if nvn >= 0:
-                for g in v.groups:
-                    weights[nvn][g.group] = g.weight
+        weights = {}
+        verts = ob.data.vertices
+        for nvn,vn in enumerate(self.verts):
+            for g in verts[vn].groups:
+                key = (g.group, g.weight)
+                if key not in weights.keys():
+                    weights[key] = []
+                weights[key].append(nvn)
 
         skeys = []
         if ob.data.shape_keys:
             for skey in ob.data.shape_keys.key_blocks:
-                data = dict([(vn, skey.data[vn].co) for vn in range(self.nverts)])
+                data = np.zeros(3*self.nverts, dtype=np.float32)
+                skey.data.foreach_get("co", data)
+                data = data.reshape(-1,3)[self.verts]
                 skeys.append((skey.name, skey.value, skey.slider_min, skey.slider_max, data))
         drivers = self.getShapekeyDrivers(ob)
 
@@ -446,19 +440,15 @@ class Proxifier(DriverUser):
         vgrps = {}
         for gn,vgname in enumerate(vgnames):
             vgrps[gn] = ob.vertex_groups.new(name=vgname)
-        for vn,grp in weights.items():
-            for gn,w in grp.items():
-                vgrps[gn].add([vn], w, 'REPLACE')
+        for (gn,w),vnums in weights.items():
+            vgrps[gn].add(vnums, w, 'REPLACE')
 
         for (sname, value, min, max, data) in skeys:
             skey = ob.shape_key_add(name=sname)
             skey.slider_min = min
             skey.slider_max = max
             skey.value = value
-            for vn,co in data.items():
-                nvn = self.vertmap[vn]
-                if nvn >= 0:
-                    skey.data[nvn].co = co
+            skey.data.foreach_set("co", data.ravel())
 
         if drivers:
             self.copyShapeKeyDrivers(ob, drivers)
@@ -475,7 +465,7 @@ class Proxifier(DriverUser):
     def getVert(self, vn):
         nvn = self.vertmap[vn]
         if nvn < 0:
-            self.verts.append(self.object.data.vertices[vn].co)
+            self.verts.append(vn)
             nvn = self.vertmap[vn] = self.lastvert
             self.lastvert += 1
         return nvn
@@ -660,52 +650,40 @@ class Proxifier(DriverUser):
                     me.materials.append(mat)
 
 
-def getUvData(ob):
-    from collections import OrderedDict
-
-    uvtex = ob.data.uv_layers
-    uvloop = ob.data.uv_layers[0]
-    uvdata = OrderedDict()
-    m = 0
-    for fn,f in enumerate(ob.data.polygons):
-        n = len(f.vertices)
-        uvdata[fn] = [uvloop.data[j].uv for j in range(m,m+n)]
-        m += n
-    return uvtex,uvloop,uvdata
-
-
 def deleteMidpoints(ob):
-    vertedges = getVertEdges(ob)
-    faceverts, vertfaces = getVertFaces(ob)
-    uvtex,uvloop,uvdata = getUvData(ob)
-
-    for vn,v in enumerate(ob.data.vertices):
-        if (len(vertedges[vn]) == 2 and
-            len(vertfaces[vn]) <= 2):
-            e = vertedges[vn][0]
-            vn1,vn2 = e.vertices
-            if vn1 == vn:
-                v.co = ob.data.vertices[vn2].co
-                moveUv(vn, vn2, vertfaces[vn], faceverts, uvdata)
-            elif vn2 == vn:
-                v.co = ob.data.vertices[vn1].co
-                moveUv(vn, vn1, vertfaces[vn], faceverts, uvdata)
-            else:
-                halt
-
-    m = 0
-    for uvs in uvdata.values():
-        for j,uv in enumerate(uvs):
-            uvloop.data[m+j].uv = uv
-        m += len(uvs)
-
-
-def moveUv(vn1, vn2, fnums, faceverts, uvdata):
-    for fn in fnums:
-        fverts = faceverts[fn]
-        n1 = getIndex(vn1, fverts)
-        n2 = getIndex(vn2, fverts)
-        uvdata[fn][n1] = uvdata[fn][n2]
+    # Move each midpoint onto the other end of its first edge, so that
+    # remove doubles merges them. Only the midpoints are visited.
+    import numpy as np
+    from .topology import getMeshTopology
+    me = ob.data
+    topo = getMeshTopology(me)
+    eoffsets,vertedges = topo.getTable("VertEdges")
+    foffsets,vertfaces = topo.getTable("VertFaces")
+    mids = np.flatnonzero((np.diff(eoffsets) == 2) & (np.diff(foffsets) <= 2))
+    if len(mids) == 0:
+        return
+    coords = np.zeros(3*len(me.vertices), dtype=np.float32)
+    me.vertices.foreach_get("co", coords)
+    coords = coords.reshape(-1,3)
+    uvloop = me.uv_layers[0]
+    uvs = np.zeros(2*len(me.loops), dtype=np.float32)
+    uvloop.data.foreach_get("uv", uvs)
+    uvs = uvs.reshape(-1,2)
+    loopstarts = np.zeros(len(me.polygons), dtype=np.int32)
+    me.polygons.foreach_get("loop_start", loopstarts)
+
+    for vn in mids.tolist():
+        vn1,vn2 = topo.edges[vertedges[eoffsets[vn]]].tolist()
+        vn2 = (vn2 if vn1 == vn else vn1)
+        coords[vn] = coords[vn2]
+        for fn in vertfaces[foffsets[vn]:foffsets[vn+1]]:
+            fverts = topo.faceverts[topo.offsets[fn]:topo.offsets[fn+1]].tolist()
+            if vn2 in fverts:
+                first = loopstarts[fn]
+                uvs[first + fverts.index(vn)] = uvs[first + fverts.index(vn2)]
+
+    me.vertices.foreach_set("co", coords.ravel())
+    uvloop.data.foreach_set("uv", uvs.ravel())
 
 
 def getIndex(vn, verts):
@@ -988,7 +966,9 @@ class DAZ_OT_SplitNgons(DazOperator, IsMesh):
 #   Find seams
 #-------------------------------------------------------------
 
-def findSeams(ob):
+def findSeams(ob, tolerance=2e-4):
+    import numpy as np
+    from .topology import getMeshTopology
     print("Find seams", ob)
     #ob.data.materials.clear()
 
@@ -996,7 +976,7 @@ def findSeams(ob):
     nfaces = len(faceverts)
     neighbors = findNeighbors(range(nfaces), faceverts, vertfaces)
 
-    texverts,texfaces = findTexVerts(ob, vertfaces)
+    texverts,texfaces = findTexVerts(ob, vertfaces, tolerance)
     _,texvertfaces = getVertFaces(ob, texverts, None, texfaces)
     texneighbors = findNeighbors(range(nfaces), texfaces, texvertfaces)
 
@@ -1007,48 +987,35 @@ def findSeams(ob):
                 if fn1 in seams.keys():
                     seams[fn1].append(fn2)
 
-    setMode('EDIT')
-    bpy.ops.mesh.select_mode(type='EDGE')
-    bpy.ops.mesh.select_all(action='SELECT')
-    bpy.ops.mesh.mark_seam(clear=True)
-    bpy.ops.mesh.select_all(action='DESELECT')
-    setMode('OBJECT')
-
-    for e in ob.data.edges:
-        vn1,vn2 = e.vertices
-        for fn1 in vertfaces[vn1]:
-            f1 = ob.data.polygons[fn1]
-            for fn2 in vertfaces[vn2]:
-                f2 = ob.data.polygons[fn2]
-                if (vn2 in f1.vertices and
-                    vn1 in f2.vertices and
-                    fn1 != fn2):
-                    if fn2 in seams[fn1]:
-                        e.select = True
-
-    vertedges = getVertEdges(ob)
-    edgefaces = getEdgeFaces(ob, vertedges)
-    for e in ob.data.edges:
-        if len(edgefaces[e.index]) != 2:
-            e.select = True
-
-    setMode('EDIT')
-    bpy.ops.mesh.mark_seam(clear=False)
-    bpy.ops.mesh.select_all(action='DESELECT')
-    setMode('OBJECT')
+    # Edges are seams if they border a seam face pair, or not exactly two faces
+    topo = getMeshTopology(ob.data)
+    offsets,edgefaces = topo.getTable("EdgeFaces")
+    pairs = [fn1*nfaces + fn2 for fn1,fns in seams.items() for fn2 in fns]
+    counts = np.diff(offsets)
+    first = offsets[:-1][counts == 2]
+    useSeams = (counts != 2)
+    useSeams[counts == 2] = np.isin(edgefaces[first]*nfaces + edgefaces[first+1], pairs)
+    ob.data.edges.foreach_set("use_seam", useSeams)
 
     print("Seams found")
     return  faceverts, vertfaces, neighbors,seams
 
 
-class DAZ_OT_FindSeams(DazOperator, IsMesh):
+class DAZ_OT_FindSeams(DazPropsOperator, IsMesh):
     bl_idname = "daz.find_seams"
     bl_label = "Find Seams"
     bl_description = "Create seams based on existing UVs"
     bl_options = {'UNDO'}
 
+    tolerance : FloatProperty(
+        name = "UV Tolerance",
+        description = "Maximal distance between UV coordinates that are considered the same",
+        min = 1e-6, max = 0.01,
+        precision = 5,
+        default = 2e-4)
+
     def run(self, context):
-        findSeams(context.object)
+        findSeams(context.object, self.tolerance)
 
 #-------------------------------------------------------------
 #   Select random strands
@@ -1083,9 +1050,9 @@ class DAZ_OT_SelectRandomStrands(DazPropsOperator, IsMesh):
         prox = Proxifier(ob)
         comps = prox.getComponents(ob, context)
         random.seed(self.seed)
-        for comp in comps.values():
-            if random.random() < self.fraction:
-                prox.selectComp(comp, ob)
+        for fn in prox.getLabelFaces():
+            if random.random() < self.fraction and fn in comps:
+                prox.selectComp(comps[fn], ob)
 
 
     def sequel(self, context):
@@ -1534,61 +1501,91 @@ class DAZ_OT_AddPush(DazOperator, IsMesh):
 #-------------------------------------------------------------
 
 def separateLoose(ob):
-    def deref(cn):
-        while cn in trail.keys():
-            cn = trail[cn]
-        return cn
-
-    verts = ob.data.vertices
-    nverts = len(verts)
-    clusters = dict([(vn,-1) for vn in range(nverts)])
-    trail = {}
-    cn = 0
-    for e in ob.data.edges:
-        vn1,vn2 = e.vertices
-        cn1 = deref(clusters[vn1])
-        cn2 = deref(clusters[vn2])
-        if cn1 < 0 and cn2 < 0:
-            clusters[vn1] = clusters[vn2] = cn
-            cn += 1
-        elif cn1 < 0:
-            clusters[vn1] = cn2
-        elif cn2 < 0:
-            clusters[vn2] = cn1
-        elif cn1 != cn2:
-            if cn1 < cn2:
-                trail[cn2] = cn1
-                clusters[vn2] = cn1
-            else:
-                trail[cn1] = cn2
-                clusters[vn1] = cn2
-
-    uvlayer = ob.data.uv_layers.active
-    fclusters = {}
-    un = 0
-    for f in ob.data.polygons:
-        vn = f.vertices[0]
-        cn = deref(clusters[vn])
-        if cn not in fclusters.keys():
-            fclusters[cn] = ({}, [], [], [])
-        assoc = fclusters[cn][0]
-        vcoord = fclusters[cn][1]
-        fcluster = fclusters[cn][2]
-        uvcoord = fclusters[cn][3]
-        nf = []
-        nv = len(vcoord)
-        for vn in f.vertices:
-            if vn in assoc.keys():
-                wn = assoc[vn]
-            else:
-                wn = assoc[vn] = nv
-                vcoord.append(verts[vn].co)
-                nv += 1
-            nf.append(wn)
-            uvcoord.append(uvlayer.data[un].uv)
-            un += 1
-        fcluster.append(nf)
-    return fclusters.values()
+    # Split the mesh into loose parts, ordered by their first face.
+    # Each part is (coords, faceverts, sizes, uvs, mnums), where faces keep their
+    # original order and vertices are numbered in order of first use.
+    import numpy as np
+    from .topology import getMeshTopology
+    me = ob.data
+    topo = getMeshTopology(me)
+    nverts = topo.nverts
+    nfaces = topo.nfaces
+    if nfaces == 0:
+        return []
+    labels = findLooseParts(nverts, topo.edges)
+    offsets = topo.offsets
+    sizes = np.diff(offsets)
+
+    # Number the parts after their first face, and sort faces by part
+    fparts = labels[topo.faceverts[offsets[:-1]]]
+    order = np.argsort(fparts, kind="stable")
+    starts = np.flatnonzero(np.r_[True, fparts[order][1:] != fparts[order][:-1]])
+    nparts = len(starts)
+    ranks = np.empty(nparts, dtype=np.int64)
+    ranks[np.argsort(order[starts])] = np.arange(nparts)
+    fparts = np.empty(nfaces, dtype=np.int64)
+    fparts[order] = np.repeat(ranks, np.diff(np.r_[starts, nfaces]))
+    faces = np.argsort(fparts, kind="stable")
+    fsizes = sizes[faces]
+    ncorners = int(fsizes.sum())
+    fstarts = np.cumsum(fsizes) - fsizes
+    corners = np.repeat(offsets[faces] - fstarts, fsizes) + np.arange(ncorners)
+    cverts = topo.faceverts[corners].astype(np.int64)
+
+    # Vertices in order of first use are grouped by part as well
+    order = np.argsort(cverts, kind="stable")
+    first = np.flatnonzero(np.r_[True, cverts[order][1:] != cverts[order][:-1]])
+    verts = cverts[order[first]][np.argsort(order[first])]
+    newverts = np.zeros(nverts, dtype=np.int64)
+    newverts[verts] = np.arange(len(verts))
+    cparts = np.repeat(fparts[faces], fsizes)
+    vcounts = np.bincount(cparts[order[first]], minlength=nparts)
+    vstarts = np.cumsum(vcounts) - vcounts
+    localverts = newverts[cverts] - vstarts[cparts]
+
+    coords = np.zeros(3*nverts, dtype=np.float32)
+    me.vertices.foreach_get("co", coords)
+    coords = coords.reshape(-1,3)[verts]
+    mnums = np.zeros(nfaces, dtype=np.int32)
+    me.polygons.foreach_get("material_index", mnums)
+    mnums = mnums[faces]
+    uvlayer = me.uv_layers.active
+    if uvlayer:
+        loopstarts = np.zeros(nfaces, dtype=np.int64)
+        me.polygons.foreach_get("loop_start", loopstarts)
+        uvs = np.zeros(2*len(me.loops), dtype=np.float32)
+        uvlayer.data.foreach_get("uv", uvs)
+        loops = np.repeat(loopstarts[faces] - fstarts, fsizes) + np.arange(ncorners)
+        uvs = uvs.reshape(-1,2)[loops]
+
+    fbounds = np.cumsum(np.bincount(fparts, minlength=nparts))[:-1]
+    cbounds = np.cumsum(np.bincount(cparts, minlength=nparts))[:-1]
+    vbounds = np.cumsum(vcounts)[:-1]
+    parts = zip(np.split(coords, vbounds),
+                np.split(localverts, cbounds),
+                np.split(fsizes, fbounds),
+                (np.split(uvs, cbounds) if uvlayer else [None]*nparts),
+                np.split(mnums, fbounds))
+    return list(parts)
+
+
+def makeLooseMesh(name, coords, faceverts, sizes, uvs, mnums):
+    import numpy as np
+    me = bpy.data.meshes.new(name)
+    me.vertices.add(len(coords))
+    me.vertices.foreach_set("co", coords.ravel())
+    me.loops.add(len(faceverts))
+    me.loops.foreach_set("vertex_index", faceverts)
+    me.polygons.add(len(sizes))
+    me.polygons.foreach_set("loop_start", np.cumsum(sizes) - sizes)
+    if bpy.app.version < (4,0,0):
+        me.polygons.foreach_set("loop_total", sizes)
+    me.update(calc_edges=True)
+    if uvs is not None:
+        uvlayer = me.uv_layers.new(name="Default")
+        uvlayer.data.foreach_set("uv", uvs.ravel())
+    me.polygons.foreach_set("material_index", mnums)
+    return me
 
 
 class DAZ_OT_SeparateLooseParts(DazOperator, IsMesh):
@@ -1611,15 +1608,9 @@ class DAZ_OT_SeparateLooseParts(DazOperator, IsMesh):
         colls = getCollections(ob, context.scene)
         if not colls:
             return
-        fclusters = separateLoose(ob)
-        idx = -1
-        for _assoc,verts,faces,uvcoord in fclusters:
-            idx += 1
-            me = bpy.data.meshes.new(ob.name)
-            me.from_pydata(verts, [], faces)
-            uvlayer = me.uv_layers.new(name="Default")
-            for n,uv in enumerate(uvcoord):
-                uvlayer.data[n].uv = uv
+        parts = separateLoose(ob)
+        for idx,part in enumerate(parts):
+            me = makeLooseMesh(ob.name, *part)
             for mat in ob.data.materials:
                 me.materials.append(mat)
             if idx == 0:
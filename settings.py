@@ -404,6 +404,7 @@ class LocalSettings:
         self.deflectors = {}
         self.materials = {}
         self.images = {}
+        self.imagePrefetcher = None
         self.textures = {}
         self.gammas = {}
         self.customShapes = []
@@ -451,10 +452,17 @@ class LocalSettings:
         G.theOtherAssets = {}
         G.theSources = {}
         setDazPaths()
+        self.stopImagePrefetch()
         self.useStrict = False
         self.scene = ""
 
 
+    def stopImagePrefetch(self):
+        if self.imagePrefetcher:
+            self.imagePrefetcher.shutdown()
+            self.imagePrefetcher = None
+
+
     def forImport(self, btn):
         self.__init__()
         self.reset()
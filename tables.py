@@ -25,9 +25,13 @@
 # of the authors and should not be interpreted as representing official policies,
 # either expressed or implied, of the FreeBSD Project.
 
-import bpy
-
 def getVertFaces(ob, verts=None, faces=None, faceverts=None):
+    if verts is None and faces is None and faceverts is None:
+        from .topology import getMeshTopology, csrToLists
+        topo = getMeshTopology(ob.data)
+        faceverts = csrToLists(topo.offsets, topo.faceverts)
+        vertfaces = dict(enumerate(csrToLists(*topo.getTable("VertFaces"))))
+        return faceverts, vertfaces
     if verts is None:
         verts = range(len(ob.data.vertices))
     if faces is None:
@@ -42,11 +46,12 @@ def getVertFaces(ob, verts=None, faces=None, faceverts=None):
 
 
 def getVertEdges(ob):
-    nverts = len(ob.data.vertices)
-    vertedges = dict([(vn,[]) for vn in range(nverts)])
-    for e in ob.data.edges:
-        for vn in e.vertices:
-            vertedges[vn].append(e)
+    from .topology import getMeshTopology, csrToLists
+    topo = getMeshTopology(ob.data)
+    edges = ob.data.edges
+    vertedges = {}
+    for vn,ens in enumerate(csrToLists(*topo.getTable("VertEdges"))):
+        vertedges[vn] = [edges[en] for en in ens]
     return vertedges
 
 
@@ -58,93 +63,153 @@ def otherEnd(vn, e):
         return vn1
 
 
-def getEdgeFaces(ob, vertedges):
-    nedges = len(ob.data.edges)
-    edgefaces = dict([(en,[]) for en in range(nedges)])
-    for f in ob.data.polygons:
-        for vn1,vn2 in f.edge_keys:
-            for e in vertedges[vn1]:
-                if vn2 in e.vertices:
-                    en = e.index
-                    edgefaces[en].append(f.index)
-    return edgefaces
+def getEdgeFaces(ob, vertedges=None):
+    from .topology import getMeshTopology, csrToLists
+    topo = getMeshTopology(ob.data)
+    return dict(enumerate(csrToLists(*topo.getTable("EdgeFaces"))))
 
 
 def getConnectedVerts(ob):
-    nverts = len(ob.data.vertices)
-    connected = dict([(vn,[]) for vn in range(nverts)])
-    for e in ob.data.edges:
-        vn1,vn2 = e.vertices
-        connected[vn1].append(vn2)
-        connected[vn2].append(vn1)
-    return connected
-
-
-def findNeighbors(faces, faceverts, vertfaces):
-    neighbors = dict([(fn,[]) for fn in faces])
-    for fn1 in faces:
-        for v1n in faceverts[fn1]:
-            for fn2 in vertfaces[v1n]:
-                if (fn2 == fn1 or
-                    fn2 in neighbors[fn1]):
-                    continue
-                for v2n in faceverts[fn2]:
-                    if (v1n != v2n and
-                        fn1 in vertfaces[v2n]):
-                        if fn2 not in neighbors[fn1]:
-                            neighbors[fn1].append(fn2)
-                        if fn1 not in neighbors[fn2]:
-                            neighbors[fn2].append(fn1)
-
-    return neighbors
+    from .topology import getMeshTopology, csrToLists
+    topo = getMeshTopology(ob.data)
+    return dict(enumerate(csrToLists(*topo.getTable("ConnectedVerts"))))
+
+
+def findNeighbors(faces, faceverts, vertfaces=None):
+    # Faces sharing a side, in ascending order.
+    # vertfaces is not needed but kept for compatibility.
+    import numpy as np
+    from .topology import getFaceNeighbors, csrToLists
+    faces = list(faces)
+    if not faces:
+        return {}
+    sfaces = sorted(faces)
+    fverts = [faceverts[fn] for fn in sfaces]
+    sizes = np.array([len(vlist) for vlist in fverts], dtype=np.int64)
+    offsets = np.zeros(len(sfaces)+1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    flat = np.fromiter((vn for vlist in fverts for vn in vlist), dtype=np.int64, count=offsets[-1])
+    nverts = int(flat.max())+1 if len(flat) else 1
+    noffsets,nindices = getFaceNeighbors(flat, offsets, nverts)
+    nindices = np.array(sfaces)[nindices]
+    neighbors = dict(zip(sfaces, csrToLists(noffsets, nindices)))
+    return dict([(fn,neighbors[fn]) for fn in faces])
+
+def findLooseParts(nverts, edges):
+    # Array union-find: hook roots onto the smallest root, then compress paths.
+    # Each vertex is labelled with the lowest vertex index in its loose part.
+    import numpy as np
+    parent = np.arange(nverts)
+    if len(edges) == 0:
+        return parent
+    v1 = edges[:,0]
+    v2 = edges[:,1]
+    while True:
+        r1 = parent[v1]
+        r2 = parent[v2]
+        diff = (r1 != r2)
+        if not diff.any():
+            return parent
+        np.minimum.at(parent, np.maximum(r1[diff], r2[diff]), np.minimum(r1[diff], r2[diff]))
+        while True:
+            grand = parent[parent]
+            if (grand == parent).all():
+                break
+            parent = grand
 
 #-------------------------------------------------------------
 #
 #-------------------------------------------------------------
 
-def findTexVerts(ob, vertfaces):
-    nfaces = len(ob.data.polygons)
-    touches = dict([(fn,[]) for fn in range(nfaces)])
-    for f1 in ob.data.polygons:
-        fn1 = f1.index
-        for vn in f1.vertices:
-            for fn2 in vertfaces[vn]:
-                if fn1 != fn2:
-                    touches[fn1].append(fn2)
-
-    uvs = ob.data.uv_layers.active.data
-    uvindices = {}
-    m = 0
-    for f in ob.data.polygons:
-        nv = len(f.vertices)
-        uvindices[f.index] = range(m, m+nv)
-        m += nv
-
-    texverts = {}
-    texfaces = {}
-    vt = 0
-    vts = {}
-    for fn1 in range(nfaces):
-        texfaces[fn1] = texface = []
-        touches[fn1].sort()
-        for m1 in uvindices[fn1]:
-            test = False
-            matched = False
-            uv1 = uvs[m1].uv
-            for fn2 in touches[fn1]:
-                if fn2 < fn1:
-                    for m2 in uvindices[fn2]:
-                        uv2 = uvs[m2].uv
-                        if (uv1-uv2).length < 2e-4:
-                            if m2 < m1:
-                                vts[m1] = vts[m2]
-                            else:
-                                vts[m2] = vts[m1]
-                            matched = True
-                            #break
-            if not matched:
-                vts[m1] = vt
-                texverts[vt] = uvs[m1].uv
-                vt += 1
-            texface.append(vts[m1])
+def findTexVerts(ob, vertfaces, tolerance=2e-4):
+    import numpy as np
+    me = ob.data
+    faces = range(len(me.polygons))
+    faceverts = [list(f.vertices) for f in me.polygons]
+    loopstarts = np.zeros(len(me.polygons), dtype=np.int32)
+    me.polygons.foreach_get("loop_start", loopstarts)
+    uvs = np.zeros(2*len(me.loops), dtype=np.float32)
+    me.uv_layers.active.data.foreach_get("uv", uvs)
+    uvs = uvs.reshape(-1,2).tolist()
+    return findFaceTexVerts(faces, faceverts, vertfaces, uvs, loopstarts.tolist(), tolerance)
+
+
+def findFaceTexVerts(faces, faceverts, vertfaces, uvs, loopstarts, tolerance=2e-4):
+    # UV corners closer than tolerance in faces that share a vertex get the
+    # same texvert. Corners are hashed on a grid with cell size twice the
+    # tolerance, once under each vertex of their face, so a match can only be
+    # in the four nearest cells under one of the corner's own face vertices.
+    # Faces must be given in ascending order. Among several matches the last
+    # corner of the last face wins. vertfaces is kept for compatibility.
+    import numpy as np
+    faces = list(faces)
+    if not faces:
+        return {}, {}
+    fsizes = np.array([len(faceverts[fn]) for fn in faces], dtype=np.int64)
+    foffsets = np.zeros(len(faces)+1, dtype=np.int64)
+    np.cumsum(fsizes, out=foffsets[1:])
+    nloops = int(foffsets[-1])
+    fverts = np.fromiter((vn for fn in faces for vn in faceverts[fn]), dtype=np.int64, count=nloops)
+    lfaces = np.repeat(np.array(faces, dtype=np.int64), fsizes)
+    lsizes = np.repeat(fsizes, fsizes)
+    lfirst = np.repeat(foffsets[:-1], fsizes)
+    fstarts = np.array([loopstarts[fn] for fn in faces], dtype=np.int64)
+    loops = np.repeat(fstarts, fsizes) + np.arange(nloops) - lfirst
+    luvs = np.array([uvs[ln] for ln in loops.tolist()], dtype=float).reshape(-1,2)
+
+    # Grid cells, and the side of the cell each corner is closest to
+    scaled = (luvs - luvs.min(axis=0))/(2*tolerance)
+    cells = np.floor(scaled).astype(np.int64)
+    sides = np.where(scaled - cells < 0.5, -1, 1)
+    height = int(cells[:,1].max()) + 3
+
+    # Pair every corner with each vertex of its face
+    corners = np.repeat(np.arange(nloops), lsizes)
+    fpos = np.arange(len(corners)) - np.repeat(np.cumsum(lsizes)-lsizes, lsizes)
+    verts = fverts[np.repeat(lfirst, lsizes) + fpos]
+
+    def getCells(dx, dy):
+        cx = cells[corners,0] + dx*sides[corners,0] + 1
+        cy = cells[corners,1] + dy*sides[corners,1] + 1
+        return cx*height + cy
+
+    regcells = getCells(0, 0)
+    ucells = np.sort(regcells)
+    ucells = ucells[np.r_[True, ucells[1:] != ucells[:-1]]]
+    regkeys = verts*len(ucells) + np.searchsorted(ucells, regcells)
+    order = np.argsort(regkeys)
+    regkeys = regkeys[order]
+    regcorners = corners[order]
+
+    best = np.full(nloops, -1, dtype=np.int64)
+    for dx in (0,1):
+        for dy in (0,1):
+            qcells = getCells(dx, dy)
+            pos = np.minimum(np.searchsorted(ucells, qcells), len(ucells)-1)
+            valid = (ucells[pos] == qcells)
+            qkeys = verts[valid]*len(ucells) + pos[valid]
+            first = np.searchsorted(regkeys, qkeys, side="left")
+            counts = np.searchsorted(regkeys, qkeys, side="right") - first
+            q = np.repeat(corners[valid], counts)
+            r = regcorners[np.repeat(first, counts) + np.arange(len(q)) - np.repeat(np.cumsum(counts)-counts, counts)]
+            keep = (lfaces[r] < lfaces[q])
+            q = q[keep]
+            r = r[keep]
+            diff = luvs[q] - luvs[r]
+            keep = (np.hypot(diff[:,0], diff[:,1]) < tolerance)
+            np.maximum.at(best, q[keep], r[keep])
+
+    # Matched corners take the texvert of the corner they matched
+    roots = np.where(best < 0, np.arange(nloops), best)
+    while True:
+        nroots = roots[roots]
+        if (nroots == roots).all():
+            break
+        roots = nroots
+    unmatched = (best < 0)
+    labels = (np.cumsum(unmatched) - 1)[roots]
+    texverts = dict(enumerate([uvs[m] for m in loops[unmatched].tolist()]))
+    labels = labels.tolist()
+    offsets = foffsets.tolist()
+    texfaces = dict([(fn, labels[offsets[n]:offsets[n+1]]) for n,fn in enumerate(faces)])
     return texverts, texfaces
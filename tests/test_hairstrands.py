@@ -0,0 +1,85 @@
+# Headless tests for hair strand extraction.
+# hairstrands.py does not use bpy, so it is loaded without the add-on's
+# __init__.py, and meshes are replaced by plain arrays.
+# Run pytest from the tests directory, since the add-on package itself needs bpy.
+
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def importModule(name):
+    if "dazpkg" not in sys.modules:
+        pkg = types.ModuleType("dazpkg")
+        pkg.__path__ = [ROOT]
+        sys.modules["dazpkg"] = pkg
+    return importlib.import_module("dazpkg.%s" % name)
+
+
+class Collection:
+    def __init__(self, n, **arrays):
+        self.n = n
+        self.arrays = arrays
+
+    def __len__(self):
+        return self.n
+
+    def foreach_get(self, attr, values):
+        values[:] = np.asarray(self.arrays[attr]).ravel()
+
+
+def makeCards(ncards, nrows=8, ncols=2, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = []
+    uvs = []
+    faces = []
+    for card in range(ncards):
+        base = len(coords)
+        origin = rng.uniform(-1, 1, 3)
+        for i in range(nrows+1):
+            for j in range(ncols+1):
+                coords.append(origin + (0.01*j, 0.0, 0.05*i))
+        for i in range(nrows):
+            for j in range(ncols):
+                vn = base + i*(ncols+1) + j
+                faces.append([vn, vn+1, vn+ncols+2, vn+ncols+1])
+                uvs += [(j/ncols, i/nrows), ((j+1)/ncols, i/nrows),
+                        ((j+1)/ncols, (i+1)/nrows), (j/ncols, (i+1)/nrows)]
+    edges = sorted(set((min(a,b), max(a,b)) for f in faces for a,b in zip(f, f[1:]+f[:1])))
+    loopverts = [vn for f in faces for vn in f]
+    me = types.SimpleNamespace(
+        vertices = Collection(len(coords), co=coords),
+        edges = Collection(len(edges), vertices=edges),
+        loops = Collection(len(loopverts), vertex_index=loopverts),
+        polygons = Collection(len(faces),
+            loop_start = 4*np.arange(len(faces)),
+            material_index = np.zeros(len(faces), dtype=int)),
+        uv_layers = types.SimpleNamespace(active=types.SimpleNamespace(
+            data = Collection(len(uvs), uv=uvs))),
+    )
+    return types.SimpleNamespace(data=me)
+
+
+def test_loose_parts():
+    hairstrands = importModule("hairstrands")
+    hmesh = hairstrands.HairMesh(makeCards(20), 'TOP')
+    parts = hmesh.getParts(True)
+    assert len(parts) == 20
+    assert sorted(fn for faces in parts for fn in faces.tolist()) == list(range(hmesh.nfaces))
+
+
+def test_serial_and_parallel_agree():
+    hairstrands = importModule("hairstrands")
+    hmesh = hairstrands.HairMesh(makeCards(200), 'TOP')
+    parts = [faces.tolist() for faces in hmesh.getParts(True)]
+    serial = hairstrands.extractAllStrands(hmesh, parts, False)
+    parallel = hairstrands.extractAllStrands(hmesh, parts, True)
+    assert len(serial) == 200
+    assert all(rects for mnum,rects,faces,nonquads in serial)
+    assert serial == parallel
@@ -0,0 +1,209 @@
+# Copyright (c) 2016-2021, Thomas Larsson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# The views and conclusions contained in the software and documentation are those
+# of the authors and should not be interpreted as representing official policies,
+# either expressed or implied, of the FreeBSD Project.
+
+
+#-------------------------------------------------------------
+#   Mesh topology as compressed sparse row (CSR) tables.
+#   A table is a pair (offsets, indices), where the entries for
+#   item n are indices[offsets[n]:offsets[n+1]].
+#-------------------------------------------------------------
+
+def groupIndices(keys, values, nkeys):
+    import numpy as np
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(nkeys+1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=nkeys), out=offsets[1:])
+    return offsets, values[order]
+
+
+def csrToLists(offsets, indices):
+    flat = indices.tolist()
+    offs = offsets.tolist()
+    return [flat[offs[n]:offs[n+1]] for n in range(len(offs)-1)]
+
+
+def getLoopEdgeKeys(faceverts, offsets, nverts):
+    # Sorted vertex pair of each face side, encoded as one integer
+    import numpy as np
+    nloops = len(faceverts)
+    nxt = np.arange(1, nloops+1)
+    nxt[offsets[1:]-1] = offsets[:-1]
+    vn1 = faceverts.astype(np.int64)
+    vn2 = vn1[nxt]
+    return np.minimum(vn1, vn2)*nverts + np.maximum(vn1, vn2), (vn1 != vn2)
+
+
+def getFaceNeighbors(faceverts, offsets, nverts):
+    # Faces that share a side with each face, in ascending order
+    import numpy as np
+    nfaces = len(offsets)-1
+    if nfaces == 0:
+        return np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    keys,valid = getLoopEdgeKeys(faceverts, offsets, nverts)
+    faces = np.repeat(np.arange(nfaces), np.diff(offsets))
+    keys = keys[valid]
+    faces = faces[valid]
+    order = np.argsort(keys)
+    keys = keys[order]
+    faces = faces[order]
+    same = (keys[1:] == keys[:-1])
+    if not (same[1:] & same[:-1]).any():
+        # Each side is shared by at most two faces
+        first = np.flatnonzero(same)
+        second = first + 1
+    else:
+        # Pair each face side with every later side in the same group
+        starts = np.flatnonzero(np.r_[True, ~same])
+        sizes = np.diff(np.r_[starts, len(keys)])
+        group = np.repeat(np.arange(len(starts)), sizes)
+        deg = starts[group] + sizes[group] - np.arange(len(keys)) - 1
+        first = np.repeat(np.arange(len(keys)), deg)
+        second = first + 1 + np.arange(len(first)) - np.repeat(np.cumsum(deg)-deg, deg)
+    f1 = np.concatenate([faces[first], faces[second]])
+    f2 = np.concatenate([faces[second], faces[first]])
+    keep = (f1 != f2)
+    pairs = np.sort(f1[keep]*nfaces + f2[keep])
+    if len(pairs):
+        pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+    return groupIndices(pairs//nfaces, pairs%nfaces, nfaces)
+
+
+class MeshTopology:
+    def __init__(self, nverts, faceverts, offsets, edges):
+        self.nverts = nverts
+        self.nfaces = len(offsets)-1
+        self.nedges = len(edges)
+        self.faceverts = faceverts
+        self.offsets = offsets
+        self.edges = edges
+        self.tables = {}
+
+
+    def getTable(self, key):
+        if key not in self.tables.keys():
+            self.tables[key] = getattr(self, "make%s" % key)()
+        return self.tables[key]
+
+
+    def makeVertFaces(self):
+        import numpy as np
+        faces = np.repeat(np.arange(self.nfaces), np.diff(self.offsets))
+        return groupIndices(self.faceverts, faces, self.nverts)
+
+
+    def makeFaceNeighbors(self):
+        return getFaceNeighbors(self.faceverts, self.offsets, self.nverts)
+
+
+    def makeVertEdges(self):
+        import numpy as np
+        edges = np.repeat(np.arange(self.nedges), 2)
+        return groupIndices(self.edges.ravel(), edges, self.nverts)
+
+
+    def makeConnectedVerts(self):
+        import numpy as np
+        return groupIndices(self.edges.ravel(), self.edges[:,::-1].ravel(), self.nverts)
+
+
+    def makeEdgeFaces(self):
+        import numpy as np
+        keys,valid = getLoopEdgeKeys(self.faceverts, self.offsets, self.nverts)
+        faces = np.repeat(np.arange(self.nfaces), np.diff(self.offsets))[valid]
+        keys = keys[valid]
+        edges = self.edges.astype(np.int64)
+        ekeys = np.minimum(edges[:,0], edges[:,1])*self.nverts + np.maximum(edges[:,0], edges[:,1])
+        order = np.argsort(ekeys)
+        pos = np.searchsorted(ekeys[order], keys)
+        pos = np.minimum(pos, max(self.nedges-1, 0))
+        found = (ekeys[order][pos] == keys) if self.nedges else np.zeros(len(keys), dtype=bool)
+        return groupIndices(order[pos[found]], faces[found], self.nedges)
+
+#-------------------------------------------------------------
+#   Topology cache.
+#   Only the topology of the last mesh is kept, since the tables
+#   of a large mesh take a lot of memory.
+#-------------------------------------------------------------
+
+theTopology = None
+
+def getMeshTopology(me):
+    global theTopology
+    import numpy as np
+    import hashlib
+    nverts = len(me.vertices)
+    nfaces = len(me.polygons)
+    nedges = len(me.edges)
+    nloops = len(me.loops)
+    loopverts = np.zeros(nloops, dtype=np.int32)
+    me.loops.foreach_get("vertex_index", loopverts)
+    starts = np.zeros(nfaces, dtype=np.int64)
+    me.polygons.foreach_get("loop_start", starts)
+    totals = np.zeros(nfaces, dtype=np.int64)
+    me.polygons.foreach_get("loop_total", totals)
+    offsets = np.zeros(nfaces+1, dtype=np.int64)
+    np.cumsum(totals, out=offsets[1:])
+    loops = np.repeat(starts - offsets[:-1], totals) + np.arange(offsets[-1])
+    faceverts = loopverts[loops]
+    edges = np.zeros(2*nedges, dtype=np.int32)
+    me.edges.foreach_get("vertices", edges)
+    edges = edges.reshape(-1,2)
+
+    digest = hashlib.sha1()
+    digest.update(np.array([nverts, nfaces, nedges], dtype=np.int64).tobytes())
+    for data in [faceverts, offsets, edges]:
+        digest.update(data.tobytes())
+    digest = digest.hexdigest()
+    key = me.name_full if hasattr(me, "name_full") else me.name
+    if theTopology:
+        oldkey,olddigest,topo = theTopology
+        if oldkey == key and olddigest == digest:
+            return topo
+    topo = MeshTopology(nverts, faceverts, offsets, edges)
+    theTopology = (key, digest, topo)
+    return topo
+
+
+def clearTopologies(*args):
+    global theTopology
+    theTopology = None
+
+#-------------------------------------------------------------
+#   Initialize
+#-------------------------------------------------------------
+
+def register():
+    import bpy
+    from bpy.app.handlers import persistent
+    bpy.app.handlers.load_post.append(persistent(clearTopologies))
+
+
+def unregister():
+    import bpy
+    if clearTopologies in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clearTopologies)
+    clearTopologies()
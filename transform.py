@@ -165,29 +165,36 @@ class Transform:
         rna.scale = (1,1,1)
 
 
-    def insertKeys(self, rig, pb, frame, group, driven):
-        self.insertTranslationKey(rig, pb, frame, group, driven)
-        self.insertRotationKey(rig, pb, frame, group, driven)
-        self.insertScaleKey(rig, pb, frame, group, driven)
+    def insertKeys(self, rig, pb, frame, group, driven, buffer=None):
+        self.insertTranslationKey(rig, pb, frame, group, driven, buffer)
+        self.insertRotationKey(rig, pb, frame, group, driven, buffer)
+        self.insertScaleKey(rig, pb, frame, group, driven, buffer)
 
 
-    def insertTranslationKey(self, rig, pb, frame, group, driven):
+    def insertKey(self, rna, channel, frame, group, buffer):
+        if buffer:
+            buffer.insert(rna, channel, frame, group)
+        else:
+            rna.keyframe_insert(channel, frame=frame, group=group)
+
+
+    def insertTranslationKey(self, rig, pb, frame, group, driven, buffer=None):
         if self.trans is None:
             return
         if pb is None:
-            rig.keyframe_insert("location", frame=frame, group=group)
+            self.insertKey(rig, "location", frame, group, buffer)
             return
         if pb.bone.use_connect or pb.name in driven:
             return
         if isLocationUnlocked(pb):
-            pb.keyframe_insert("location", frame=frame, group=group)
+            self.insertKey(pb, "location", frame, group, buffer)
 
 
-    def insertRotationKey(self, rig, pb, frame, group, driven):
+    def insertRotationKey(self, rig, pb, frame, group, driven, buffer=None):
         if self.rot is None:
             return
         if pb is None:
-            rig.keyframe_insert("rotation_euler", frame=frame, group=group)
+            self.insertKey(rig, "rotation_euler", frame, group, buffer)
             return
         if pb.name in driven:
             return
@@ -195,21 +202,146 @@ class Transform:
             channel = "rotation_quaternion"
         else:
             channel = "rotation_euler"
-        pb.keyframe_insert(channel, frame=frame, group=group)
+        self.insertKey(pb, channel, frame, group, buffer)
 
 
-    def insertScaleKey(self, rig, pb, frame, group, driven):
+    def insertScaleKey(self, rig, pb, frame, group, driven, buffer=None):
         if self.scale is None and self.general is None:
             return
         if pb is None:
-            rig.keyframe_insert("scale", frame=frame, group=group)
+            self.insertKey(rig, "scale", frame, group, buffer)
             return
         if pb.name in driven:
             return
         if (pb.lock_scale[0] == False or
             pb.lock_scale[1] == False or
             pb.lock_scale[2] == False):
-            pb.keyframe_insert("scale", frame=frame, group=group)
+            self.insertKey(pb, "scale", frame, group, buffer)
+
+#-------------------------------------------------------------
+#   Keyframe buffer
+#   Collects keyframes while posing and writes each F-curve once
+#-------------------------------------------------------------
+
+class KeyframeBuffer:
+    def __init__(self, rig):
+        self.rig = rig
+        self.curves = {}
+        self.arrays = {}
+
+
+    def getDataPath(self, rna, channel):
+        if rna == self.rig:
+            return channel
+        elif channel[0] == "[":
+            return 'pose.bones["%s"]%s' % (rna.name, channel)
+        else:
+            return 'pose.bones["%s"].%s' % (rna.name, channel)
+
+
+    def insert(self, rna, channel, frame, group):
+        path = self.getDataPath(rna, channel)
+        value = rna.path_resolve(channel)
+        if hasattr(value, "__len__"):
+            value = tuple(value)
+        else:
+            value = (float(value),)
+        self.addValues(path, group, frame, value)
+
+
+    def addValues(self, path, group, frame, value):
+        if path not in self.curves.keys():
+            self.curves[path] = (group, {})
+        self.curves[path][1][frame] = value
+
+
+    def addCurves(self, rna, channel, group, frames, values):
+        import numpy as np
+        path = self.getDataPath(rna, channel)
+        values = np.asarray(values, dtype=np.float32)
+        if values.ndim == 1:
+            values = values.reshape((len(values),1))
+        self.arrays[path] = (group, np.asarray(frames, dtype=np.float32), values)
+
+
+    def write(self, interpolation=None):
+        import bpy
+        import numpy as np
+        if not (self.curves or self.arrays):
+            return 0
+        rig = self.rig
+        if rig.animation_data is None:
+            rig.animation_data_create()
+        act = rig.animation_data.action
+        if act is None:
+            act = rig.animation_data.action = bpy.data.actions.new("%sAction" % rig.name)
+        if interpolation is None:
+            interpolation = bpy.context.preferences.edit.keyframe_new_interpolation_type
+        nkeys = 0
+        for path,data in self.curves.items():
+            group,keys = data
+            frames = np.array(list(keys.keys()), dtype=np.float32)
+            values = np.array(list(keys.values()), dtype=np.float32)
+            nkeys += self.writeCurves(act, path, group, frames, values, interpolation)
+        for path,data in self.arrays.items():
+            group,frames,values = data
+            nkeys += self.writeCurves(act, path, group, frames, values, interpolation)
+        self.curves = {}
+        self.arrays = {}
+        return nkeys
+
+
+    def writeCurves(self, act, path, group, frames, values, interpolation):
+        import bpy
+        import numpy as np
+        from .animation import getKeyData, clearKeyPoints
+        ipo = bpy.types.Keyframe.bl_rna.properties["interpolation"].enum_items[interpolation].value
+        order = np.argsort(frames, kind="stable")
+        frames = frames[order]
+        values = values[order]
+        nkeys = 0
+        for idx in range(values.shape[1]):
+            co = np.empty((len(frames),2), dtype=np.float32)
+            co[:,0] = frames
+            co[:,1] = values[:,idx]
+            fcu = act.fcurves.find(path, index=idx)
+            if fcu:
+                olddata = getKeyData(fcu)
+                clearKeyPoints(fcu.keyframe_points)
+            else:
+                fcu = act.fcurves.new(path, index=idx, action_group=group)
+                olddata = None
+            nkeys += self.mergeKeys(fcu, co, ipo, olddata)
+            fcu.update()
+        return nkeys
+
+
+    def mergeKeys(self, fcu, co, ipo, olddata):
+        # Old keys at other frames keep all their attributes, and new keys get
+        # the defaults of added keys with the given interpolation.
+        import numpy as np
+        from .animation import getKeyData
+        kpts = fcu.keyframe_points
+        nnew = len(co)
+        if olddata is None:
+            kpts.add(nnew)
+            kpts.foreach_set("co", co.ravel())
+            kpts.foreach_set("interpolation", np.full(nnew, ipo, dtype=np.int32))
+            return nnew
+        oldkeep = np.isin(olddata["co"][:,0], co[:,0], invert=True)
+        nold = np.count_nonzero(oldkeep)
+        order = np.argsort(np.concatenate((olddata["co"][oldkeep,0], co[:,0])), kind="stable")
+        kpts.add(nold + nnew)
+        for attr,newvalues in getKeyData(fcu).items():
+            if attr == "co":
+                newvalues = co
+            elif attr == "interpolation":
+                newvalues = np.full((nnew,1), ipo, dtype=np.int32)
+            else:
+                newvalues = newvalues[:nnew]
+            values = np.concatenate((olddata[attr][oldkeep], newvalues))[order]
+            kpts.foreach_set(attr, values.ravel())
+        return nold + nnew
 
 #-------------------------------------------------------------
 #   Rounding
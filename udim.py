@@ -59,9 +59,15 @@ class DAZ_OT_UdimizeMaterials(DazPropsOperator, MaterialSelector):
         description = "Merge materials and not only textures.\nIf on, some info may be lost.\nIf off, Merge Materials must be called afterwards",
         default = False)
 
+    useSelectedMeshes : BoolProperty(
+        name = "Selected Meshes",
+        description = "Also udimize materials with the same names in other selected meshes",
+        default = False)
+
     def draw(self, context):
         self.layout.prop(self, "useFixTiles")
         self.layout.prop(self, "useMergeMaterials")
+        self.layout.prop(self, "useSelectedMeshes")
         self.layout.prop(self, "trgmat")
         self.layout.label(text="Materials To Merge")
         MaterialSelector.draw(self, context)
@@ -82,44 +88,61 @@ class DAZ_OT_UdimizeMaterials(DazPropsOperator, MaterialSelector):
 
 
     def run(self, context):
-        from shutil import copyfile
-
         ob = context.object
         mats = []
-        mnums = []
         amat = None
-        for mn,umat in enumerate(self.umats):
+        for umat in self.umats:
             if umat.bool:
                 mat = ob.data.materials[umat.name]
                 mats.append(mat)
-                mnums.append(mn)
                 if amat is None or mat.name == self.trgmat:
                     amat = mat
-                    amnum = mn
-                    atile = 1001 + mat.DazUDim
-
         if amat is None:
             raise DazError("No materials selected")
 
+        meshes = [ob]
+        if self.useSelectedMeshes:
+            meshes += [ob1 for ob1 in getSelectedMeshes(context)
+                       if ob1 != ob and ob1.DazLocalTextures]
+
         self.nodes = {}
         for mat in mats:
             self.nodes[mat.name] = self.getChannels(mat)
 
         if self.useFixTiles:
-            for f in ob.data.polygons:
-                f.select = False
-            for mn,mat in zip(mnums, mats):
-                self.fixTiles(mat, mn, ob)
+            shifts = self.getTileShifts(mats)
+            if shifts:
+                for ob1 in meshes:
+                    shiftMaterialUVs(ob1, shifts)
+
+        if self.isUdimized(amat):
+            print("Material %s already UDIM" % amat.name)
+        else:
+            self.buildUdimImages(mats, amat)
+
+        if self.useMergeMaterials:
+            for ob1 in meshes:
+                self.mergeMaterials(ob1, mats, amat)
+        else:
+            self.shareImages(mats, amat)
+
+
+    def isUdimized(self, amat):
+        for anode in self.nodes[amat.name].values():
+            if anode.image and anode.image.source == "TILED":
+                return True
+        return False
 
+
+    def buildUdimImages(self, mats, amat):
+        atile = 1001 + amat.DazUDim
+        copied = {}
         for key,anode in self.nodes[amat.name].items():
-            if anode.image.source == "TILED":
-                raise DazError("Material %s already UDIM  " % amat.name)
+            if anode.image is None:
+                continue
+            imgname = anode.image.name
             anode.image.source = "TILED"
             anode.extension = "CLIP"
-            if anode.image:
-                imgname = anode.image.name
-            else:
-                imgname = anode.name
             basename = "T_%s" % self.getBaseName(imgname, amat.DazUDim)
             udims = {}
             for mat in mats:
@@ -127,7 +150,9 @@ class DAZ_OT_UdimizeMaterials(DazPropsOperator, MaterialSelector):
                 if key in nodes.keys():
                     node = nodes[key]
                     img = node.image
-                    self.updateImage(img, basename, mat.DazUDim)
+                    if img is None:
+                        continue
+                    self.updateImage(img, basename, mat.DazUDim, copied)
                     if mat.DazUDim not in udims.keys():
                         udims[mat.DazUDim] = mat.name
                     if mat == amat:
@@ -141,51 +166,70 @@ class DAZ_OT_UdimizeMaterials(DazPropsOperator, MaterialSelector):
                 if udim == 0:
                     tile0.number = 1001
                     tile0.label = mname
-                else:
+                elif not [tile for tile in img.tiles if tile.number == 1001+udim]:
                     img.tiles.new(tile_number=1001+udim, label=mname)
 
-        if self.useMergeMaterials:
-            for f in ob.data.polygons:
-                if f.material_index in mnums:
-                    f.material_index = amnum
-
-            mnums.reverse()
-            for mn in mnums:
-                if mn != amnum:
-                    ob.data.materials.pop(index=mn)
-        else:
-            anodes = self.nodes[amat.name]
-            for mat in mats:
-                if mat != amat:
-                    nodes = self.nodes[mat.name]
-                    for key,node in nodes.items():
-                        if key in anodes.keys():
-                            anode = anodes[key]
-                            img = node.image = anode.image
-                            node.extension = "CLIP"
-                            node.label = anode.label
-                            node.name = anode.name
+
+    def mergeMaterials(self, ob, mats, amat):
+        import numpy as np
+        mnames = [mat.name for mat in mats]
+        mnums = [mn for mn,mat in enumerate(ob.data.materials)
+                 if mat and mat.name in mnames]
+        if amat.name not in ob.data.materials.keys():
+            print("%s does not have material %s" % (ob.name, amat.name))
+            return
+        amnum = ob.data.materials.keys().index(amat.name)
+        nfaces = len(ob.data.polygons)
+        findices = np.empty(nfaces, dtype=np.int32)
+        ob.data.polygons.foreach_get("material_index", findices)
+        findices[np.isin(findices, mnums)] = amnum
+        ob.data.polygons.foreach_set("material_index", findices)
+
+        mnums.reverse()
+        for mn in mnums:
+            if mn != amnum:
+                ob.data.materials.pop(index=mn)
+
+
+    def shareImages(self, mats, amat):
+        anodes = self.nodes[amat.name]
+        for mat in mats:
+            if mat != amat:
+                nodes = self.nodes[mat.name]
+                for key,node in nodes.items():
+                    if key in anodes.keys():
+                        anode = anodes[key]
+                        img = node.image = anode.image
+                        node.extension = "CLIP"
+                        node.label = anode.label
+                        node.name = anode.name
 
 
     def makeImageName(self, basename, tile, img):
         return "%s%s" % (basename, os.path.splitext(img.name)[1])
 
 
-    def fixTiles(self, mat, mn, ob):
+    def getTileShifts(self, mats):
+        shifts = {}
+        for mat in mats:
+            tile = self.getImageTile(mat)
+            if tile is not None and mat.DazUDim != tile:
+                print(" Shift", mat.name, tile - mat.DazUDim)
+                shifts[mat.name] = (tile - mat.DazUDim, 0)
+        return shifts
+
+
+    def getImageTile(self, mat):
         for node in self.nodes[mat.name].values():
             if node.image:
                 imgname = node.image.name
                 if imgname[-4:].isdigit():
-                    tile = int(imgname[-4:]) - 1001
+                    return int(imgname[-4:]) - 1001
                 elif (imgname[-8:-4].isdigit() and
                       imgname[-4] == "." and
                       imgname[-3:].isdigit()):
-                    tile = int(imgname[-8:-4]) - 1001
-                else:
-                    continue
-                if mat.DazUDim != tile:
-                    shiftUVs(mat, mn, ob, tile)
-                return
+                    return int(imgname[-8:-4]) - 1001
+        return None
 
 
     def getChannels(self, mat):
@@ -220,16 +264,18 @@ class DAZ_OT_UdimizeMaterials(DazPropsOperator, MaterialSelector):
         return string
 
 
-    def updateImage(self, img, basename, udim):
+    def updateImage(self, img, basename, udim, copied):
         from shutil import copyfile
         src = bpy.path.abspath(img.filepath)
         src = bpy.path.reduce_dirs([src])[0]
         folder = os.path.dirname(src)
         fname,ext = os.path.splitext(bpy.path.basename(src))
         trg = os.path.join(folder, "%s_%d%s" % (basename, 1001+udim, ext))
-        if src != trg and not os.path.exists(trg):
-            print("Copy %s\n => %s" % (src, trg))
-            copyfile(src, trg)
+        if trg not in copied.keys():
+            if src != trg and not os.path.exists(trg):
+                print("Copy %s\n => %s" % (src, trg))
+                copyfile(src, trg)
+            copied[trg] = True
         img.filepath = bpy.path.relpath(trg)
 
 #----------------------------------------------------------
@@ -239,15 +285,41 @@ class DAZ_OT_UdimizeMaterials(DazPropsOperator, MaterialSelector):
 def shiftUVs(mat, mn, ob, tile):
     ushift = tile - mat.DazUDim
     print(" Shift", mat.name, mn, ushift)
-    uvloop = ob.data.uv_layers.active
-    m = 0
-    for fn,f in enumerate(ob.data.polygons):
-        if f.material_index == mn:
-            for n in range(len(f.vertices)):
-                uvloop.data[m].uv[0] += ushift
-                m += 1
-        else:
-            m += len(f.vertices)
+    shiftMaterialUVs(ob, {mat.name : (ushift, 0)})
+
+
+def shiftMaterialUVs(ob, shifts):
+    import numpy as np
+    me = ob.data
+    uvlayer = me.uv_layers.active
+    if uvlayer is None:
+        return
+    offsets = np.zeros((max(len(me.materials), 1), 2), dtype=np.float32)
+    found = False
+    for mn,mat in enumerate(me.materials):
+        if mat and mat.name in shifts.keys():
+            offsets[mn] = shifts[mat.name]
+            found = True
+    if not found:
+        return
+
+    nfaces = len(me.polygons)
+    nloops = len(me.loops)
+    findices = np.empty(nfaces, dtype=np.int32)
+    me.polygons.foreach_get("material_index", findices)
+    np.clip(findices, 0, len(offsets)-1, out=findices)
+    starts = np.empty(nfaces, dtype=np.int32)
+    me.polygons.foreach_get("loop_start", starts)
+    totals = np.empty(nfaces, dtype=np.int32)
+    me.polygons.foreach_get("loop_total", totals)
+    firsts = np.cumsum(totals) - totals
+    lidxs = np.repeat(starts - firsts, totals) + np.arange(nloops)
+
+    uvs = np.empty((nloops, 2), dtype=np.float32)
+    uvlayer.data.foreach_get("uv", uvs.ravel())
+    uvs[lidxs] += np.repeat(offsets[findices], totals, axis=0)
+    uvlayer.data.foreach_set("uv", uvs.ravel())
+    me.update()
 
 #----------------------------------------------------------
 #   Set Udims to given tile